@@ -1,258 +1,556 @@
+import os
+from functools import partial
 import streamlit as st
 import pandas as pd
 import json
 import plotly.express as px
-from essentials import RobotPathVisualizer
+from essentials import INSIGHT_COLUMNS, RobotPathVisualizer, compute_fleet_insights
+from filter_index import FilterIndex
+from log_cache import LogFrameCache
+from log_store import LogStore
+from perf import NULL_PROFILER, StageProfiler, enable_logging, figure_points
+from prefetch import PrefetchCache
+from rollups import build_rollup, count_by
+from script_diff import ScriptDiff
+from log_loader import FAILURE_THRESHOLD, FAILURE_UNEQUAL_LENGTH, content_hash, load_log
 
-def main(): 
-    st.set_page_config(layout="wide")
-    st.title("Test Case Report")
+# Lines of diff / raw script sent to the browser per page in the Test Scripts section
+DIFF_PAGE_LINES = 400
+SCRIPT_PAGE_LINES = 500
 
-    # File uploader
-    uploaded_file = st.sidebar.file_uploader("Upload LOG file", type=['json'])
-    # local_file = r"C:\mac\aug\QA_dashboard\test_logs\test_log_file.json"  
 
-    if uploaded_file is not None:
-        try:
-            json_data = uploaded_file.read()
-            if json_data:
-                # If the content is not empty, try loading the JSON
-                json_data = json.loads(json_data)
-                st.sidebar.success("JSON file loaded successfully!")
-                # Convert JSON data to DataFrame
-                df = pd.DataFrame(json_data)
-                df['startdate'] = pd.to_datetime(df['startdate'])
-                df['date'] = df['startdate'].dt.date
-                df['status'] = df['test_status'].apply(lambda x: 'Failed' if 'FAIL' in x else 'Passed')
-                df['category'] = df['testname'].apply(lambda x: x.split(' ')[0] if x else 'Unknown')
-                
-                # Add failure type classification
-                def get_failure_type(test_status):
-                    if 'FAIL' not in test_status:
-                        return None
-                    elif 'Files have unequal lengths' in test_status:
-                        return 'Files have unequal lengths'
-                    else:
-                        return 'Fail due to threshold'
-                
-                df['failure_type'] = df['test_status'].apply(get_failure_type)
-                
-                # Filters
-                st.sidebar.header("Filters")
-                dates = sorted(df['date'].unique())
-                # selected_dates = st.sidebar.multiselect("Select Dates", dates, default=dates)
-                selected_dates = st.sidebar.selectbox("Select Date", dates, index=0)  # Changed to single select
+@st.cache_resource
+def get_log_cache():
+    # Shared across sessions and reruns; set QA_DASHBOARD_CACHE_DIR to spill evicted logs to Parquet
+    return LogFrameCache(
+        max_entries=int(os.environ.get('QA_DASHBOARD_CACHE_ENTRIES', 4)),
+        spill_dir=os.environ.get('QA_DASHBOARD_CACHE_DIR')
+    )
 
-                selected_status = st.sidebar.radio("Select Status to View Tests", ['Home', 'Passed', 'Failed'])
-                
-                # Add failure type filter when Failed is selected
-                selected_failure_types = None
-                if selected_status == 'Failed':
-                    failure_types = ['Files have unequal lengths', 'Fail due to threshold']
-                    selected_failure_types = st.sidebar.multiselect(
-                        "Select Failure Types",
-                        failure_types,
-                        default=failure_types
+
+@st.cache_resource(max_entries=4)
+def get_fleet_cache(file_hash):
+    # Per-test deviation metrics for one log, keyed by script_ref
+    return {}
+
+
+@st.cache_resource
+def get_visualization_cache():
+    # Parsed paths, insights and figures of recently viewed and neighbouring tests
+    return PrefetchCache(
+        max_entries=int(os.environ.get('QA_DASHBOARD_PREFETCH_ENTRIES', 16)),
+        max_workers=int(os.environ.get('QA_DASHBOARD_PREFETCH_WORKERS', 2))
+    )
+
+
+def build_visualization(test_case, max_points, profiler=NULL_PROFILER):
+    # Everything the detail view needs for one test; runs on the prefetch pool for neighbours
+    visualizer = RobotPathVisualizer(test_case, max_points=max_points, profiler=profiler)
+    return {
+        'insights': visualizer.generate_insights_report(),
+        'figure_3d_paths': visualizer.plot_3d_paths(),
+        'figure_deviation_analysis': visualizer.plot_deviation_analysis()
+    }
+
+
+@st.cache_resource(max_entries=32)
+def get_script_diff(data_key, script_ref, _master_script, _test_script):
+    # Diffed once per test; the script texts themselves are not hashed
+    return ScriptDiff(_master_script, _test_script)
+
+
+@st.cache_resource(max_entries=4)
+def get_filter_index(file_hash, _df):
+    # Built once per log; the leading underscore keeps Streamlit from hashing the frame
+    return FilterIndex(_df)
+
+
+def ingest_log(uploaded_file, scripts, profiler=NULL_PROFILER):
+    # Stream the upload record by record; the progress bar only shows on a cache miss
+    progress_bar = st.sidebar.progress(0.0, text="Loading log...")
+    with profiler.stage('ingest', bytes=uploaded_file.size) as record:
+        df = load_log(
+            uploaded_file,
+            progress=lambda fraction: progress_bar.progress(fraction, text="Loading log..."),
+            scripts=scripts
+        )
+        record['rows'] = len(df)
+    progress_bar.empty()
+    return df
+
+
+def upload_hash(uploaded_file, profiler=NULL_PROFILER):
+    # Digest remembered per session by upload id, so widget reruns never re-read the file
+    hashes = st.session_state.setdefault('upload_hashes', {})
+    upload_key = (uploaded_file.file_id, uploaded_file.size)
+    if upload_key not in hashes:
+        with profiler.stage('content_hash', bytes=uploaded_file.size):
+            hashes[upload_key] = content_hash(uploaded_file)
+    return hashes[upload_key]
+
+
+def show_chart(fig, profiler, stage):
+    # Timed separately from figure construction: this covers Plotly serialization and send
+    with profiler.stage(stage) as record:
+        if profiler.enabled:
+            record.update(figure_points(fig))
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def render_performance_panel(profiler):
+    # Opt-in: with recording off every stage is a shared no-op context
+    with st.sidebar.expander("Performance", expanded=profiler.enabled):
+        st.checkbox("Record stage timings", key='perf_enabled')
+        st.checkbox("Track memory (slower)", key='perf_memory', disabled=not profiler.enabled)
+        if profiler.records:
+            st.dataframe(pd.DataFrame(profiler.records), use_container_width=True, hide_index=True)
+            st.download_button(
+                "Download as JSON lines",
+                profiler.to_json_lines(),
+                file_name='dashboard_stages.jsonl',
+                mime='application/json'
+            )
+            enable_logging()
+            profiler.log()
+
+
+@st.cache_resource(max_entries=4)
+def get_rollup(file_hash, _df):
+    # Daily counts for the Home charts, built once per uploaded log
+    return build_rollup(_df)
+
+
+@st.cache_resource
+def get_log_store(store_dir):
+    return LogStore(store_dir)
+
+
+@st.cache_resource(max_entries=8)
+def get_store_day(_store, store_key, day):
+    # Only the partition of the selected date is read; store_key changes on every ingest
+    return _store.load([day])
+
+
+@st.cache_resource(max_entries=2)
+def get_store_rollup(_store, store_key):
+    # Maintained incrementally by the store on every ingest
+    return _store.rollup()
+
+
+def render_log_store(profiler=NULL_PROFILER):
+    # Multi-file mode: logs are appended to a date-partitioned Parquet store and kept across sessions
+    store_dir = st.sidebar.text_input("Log store directory", os.environ.get('QA_DASHBOARD_STORE_DIR', 'log_store'))
+    try:
+        store = get_log_store(store_dir)
+        uploaded_files = st.sidebar.file_uploader("Add LOG files to the store", type=['json'], accept_multiple_files=True)
+        for uploaded_file in uploaded_files or []:
+            if not uploaded_file.size:
+                st.sidebar.error(f"{uploaded_file.name} is empty!")
+            else:
+                with profiler.stage('store_ingest', bytes=uploaded_file.size):
+                    added = store.ingest(
+                        uploaded_file, name=uploaded_file.name, file_hash=upload_hash(uploaded_file, profiler)
                     )
-                
-                # Filter data
-                filtered_df = df[df['date'] == selected_dates] 
-                # filtered_df = df[df['date'].isin(selected_dates)]
-                if selected_status != 'Home':
-                    filtered_df = filtered_df[filtered_df['status'] == selected_status]
-                    if selected_status == 'Failed' and selected_failure_types:
-                        filtered_df = filtered_df[filtered_df['failure_type'].isin(selected_failure_types)]
-
-                        if filtered_df.empty:
-                            # Display the message in green color under the 'selected_failure_types' content
-                            st.sidebar.markdown(f'<p style="color:green;">No error with: {str(selected_failure_types[0])}</p>', unsafe_allow_html=True)
-                        
-                
-                if selected_status != 'Home' and not filtered_df.empty:
-                    available_categories = filtered_df['category'].unique()
-                    selected_category = st.sidebar.selectbox("Select Category to View", available_categories)
-                    filtered_category_df = filtered_df[filtered_df['category'] == selected_category]
-                    
-                    if not filtered_category_df.empty:
-                        selected_test = st.sidebar.selectbox(
-                            "Select Test to View Details", 
-                            filtered_category_df['testname'].tolist()
+                if added:
+                    st.sidebar.success(f"Added {uploaded_file.name} to the log store")
+
+        watch_dir = st.sidebar.text_input("Watch directory (optional)", os.environ.get('QA_DASHBOARD_WATCH_DIR', ''))
+        if watch_dir:
+            ingested, failed = store.ingest_directory(watch_dir)
+            for name in ingested:
+                st.sidebar.success(f"Added {name} to the log store")
+            for name, error in failed:
+                st.sidebar.error(f"Could not ingest {name}: {error}")
+
+        dates = store.dates()
+        if not dates:
+            st.info("The log store is empty. Add LOG files or set a watch directory.")
+            return
+
+        store_key = (store.root, store.version)
+        render_dashboard(
+            dates,
+            lambda day: get_store_day(store, store_key, day) + ((store_key, day),),
+            get_store_rollup(store, store_key),
+            profiler
+        )
+
+    except json.JSONDecodeError:
+        st.sidebar.error("Invalid JSON file. Please upload a valid JSON file.")
+    except Exception as e:
+        st.sidebar.error(f"An error occurred: {str(e)}")
+
+
+def render_dashboard(dates, load_day, rollup, profiler=NULL_PROFILER):
+    # load_day(date) -> (df, scripts, data_key) with the rows the views of that date need;
+    # rollup holds the daily counts behind the Home charts for the full history
+    # Filters
+    st.sidebar.header("Filters")
+    # selected_dates = st.sidebar.multiselect("Select Dates", dates, default=dates)
+    selected_dates = st.sidebar.selectbox("Select Date", dates, index=0)  # Changed to single select
+    with profiler.stage('load_day') as record:
+        df, scripts, data_key = load_day(selected_dates)
+        filter_index = get_filter_index(data_key, df)
+        record['rows'] = len(df)
+
+    selected_status = st.sidebar.radio("Select Status to View Tests", ['Home', 'Passed', 'Failed'])
+
+    # Add failure type filter when Failed is selected
+    selected_failure_types = None
+    if selected_status == 'Failed':
+        failure_types = [FAILURE_UNEQUAL_LENGTH, FAILURE_THRESHOLD]
+        selected_failure_types = st.sidebar.multiselect(
+            "Select Failure Types",
+            failure_types,
+            default=failure_types
+        )
+
+    # Filter data through the precomputed index: each level costs O(result), not O(rows)
+    filter_status = None if selected_status == 'Home' else selected_status
+    with profiler.stage('filter') as record:
+        filtered_positions = filter_index.positions(selected_dates, filter_status, selected_failure_types)
+        record['rows'] = len(filtered_positions)
+    if selected_status == 'Failed' and selected_failure_types and not len(filtered_positions):
+        # Display the message in green color under the 'selected_failure_types' content
+        st.sidebar.markdown(f'<p style="color:green;">No error with: {str(selected_failure_types[0])}</p>', unsafe_allow_html=True)
+
+
+    if selected_status != 'Home' and len(filtered_positions):
+        available_categories = filter_index.categories(selected_dates, selected_status, selected_failure_types)
+        selected_category = st.sidebar.selectbox("Select Category to View", available_categories)
+        category_tests = filter_index.testnames(
+            selected_dates, selected_status, selected_failure_types, selected_category
+        )
+
+        if category_tests:
+            selected_test = st.sidebar.selectbox(
+                "Select Test to View Details", 
+                category_tests
+            )
+
+            if selected_test:
+                test_case = filter_index.test_record(
+                    selected_test, selected_dates, selected_status, selected_failure_types, selected_category
+                )
+                # Script text is kept out of the DataFrame and fetched only for the selected test
+                with profiler.stage('script_fetch'):
+                    test_case.update(scripts.get(test_case['script_ref']))
+
+                # Check if test failed due to unequal lengths
+                is_unequal_length_fail = test_case['test_status'] == "\u274c FAIL: Files have unequal lengths."
+
+                # Display test details in two columns
+                st.header("Test Details")
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.write(f"**Test Name:** {test_case['testname']}")
+                    st.write(f"**Test Date:** {test_case['startdate']}")
+                    st.write(f"**Status:** {test_case['test_status']}")
+
+                # Level of detail: long paths are decimated to this point budget, peaks are always kept
+                max_plot_points = st.sidebar.number_input(
+                    "Max plot points per trace (0 = all)", min_value=0, value=5000, step=500
+                )
+
+                # Unequal-length paths are paired with banded DTW instead of being compared by index
+                if is_unequal_length_fail:
+                    st.info("Files have unequal lengths: moves are aligned with dynamic time warping before comparison.")
+
+                visualization_cache = get_visualization_cache()
+                try:
+                    # Keyed by script_ref: unique per row of the loaded data
+                    visualization_key = (data_key, test_case['script_ref'], max_plot_points)
+                    with profiler.stage('visualization') as record:
+                        record['prefetched'] = visualization_key in visualization_cache
+                        visualization = visualization_cache.get(
+                            visualization_key,
+                            lambda: build_visualization(test_case, max_plot_points or None, profiler)
                         )
-                        
-                        if selected_test:
-                            test_case = filtered_category_df[
-                                filtered_category_df['testname'] == selected_test
-                            ].iloc[0].to_dict()
-                            
-                            # Check if test failed due to unequal lengths
-                            is_unequal_length_fail = test_case['test_status'] == "\u274c FAIL: Files have unequal lengths."
-                            
-                            # Display test details in two columns
-                            st.header("Test Details")
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.write(f"**Test Name:** {test_case['testname']}")
-                                st.write(f"**Test Date:** {test_case['startdate']}")
-                                st.write(f"**Status:** {test_case['test_status']}")
-                            
-                            # Only show analysis if not an unequal length failure
-                            if not is_unequal_length_fail:
-                                try:
-                                    PathVisualizer = RobotPathVisualizer(test_case)
-                                    insights = PathVisualizer.generate_insights_report()
-
-                                    deviations_data = {
-                                        'Axis': ['X', 'Y', 'Z'],
-                                        'Max Deviations (mm)': [insights['max_deviation']['x'], 
-                                                                insights['max_deviation']['y'], 
-                                                                insights['max_deviation']['z']],
-                                        'Mean Deviations (mm)': [insights['mean_deviation']['x'], 
-                                                                insights['mean_deviation']['y'], 
-                                                                insights['mean_deviation']['z']]
-                                    }
-
-                                    df_deviations = pd.DataFrame(deviations_data)
-
-                                    # Convert DataFrame to HTML table with custom CSS
-                                    html_table = df_deviations.to_html(index=False, escape=False)
-
-                                    # Custom CSS for table alignment
-                                    table_style = """
-                                        <style>
-                                            table {
-                                                width: 100%;
-                                                text-align: center;
-                                                margin-left: auto;
-                                                margin-right: auto;
-                                            }
-                                            th, td {
-                                                padding: 8px;
-                                                text-align: center;
-                                            }
-                                        </style>
-                                    """
-                                                                                        
-                                    with col2:
-                                        st.write("**Deviation Insights**")
-                                        st.markdown(table_style, unsafe_allow_html=True)
-                                        st.markdown(html_table, unsafe_allow_html=True)
-
-                                    st.header("Visualization")
-                                    st.plotly_chart(PathVisualizer.plot_3d_paths(), use_container_width=True)
-                                    st.plotly_chart(PathVisualizer.plot_deviation_analysis(), use_container_width=True)
-
-                                except Exception as e:
-                                    st.error(f"Error generating visualizations: {str(e)}")
-                            
-                            # Display scripts at the bottom
-                            st.header("Test Scripts")
-                            col_scripts1, col_scripts2 = st.columns(2)
-                            col_scripts3, col_scripts4 = st.columns(2)
-                            
-                            with col_scripts1:
-                                master_script = test_case.get('master_script', 'No master script found')
-                                st.write("**Master Script:**")
-                                st.code(master_script, language='python')
-                            
-                            with col_scripts2:
-                                test_script = test_case.get('test_script', 'No test script found')
-                                st.write("**Test Script:**")
-                                st.code(test_script, language='python')
-
-                            # Get the 'diff_or_unequal_length_info' from test_case
-                            diff_info = test_case.get('unequal_length_info', {})
-
-                            if diff_info:
-                                extra_master_script = diff_info.get('extra_lines_in_file1', [])
-                                extra_test_script = diff_info.get('extra_lines_in_file2', [])
-                                formatted_master_script = "\n".join(extra_master_script) if extra_master_script else 'No extra lines found in Master Script.'
-                                formatted_test_script = "\n".join(extra_test_script) if extra_test_script else 'No extra lines found in Test Script.'
-
-                                with st.expander("Extra lines in scripts", expanded=False):
-                                    col_scripts3, col_scripts4 = st.columns(2)
-
-                                    with col_scripts3:
-                                        st.write("**Extra lines on Master Script:**")
-                                        st.code(formatted_master_script, language='python')
-
-                                    with col_scripts4:
-                                        st.write("**Extra lines on Test Script:**")
-                                        st.code(formatted_test_script, language='python')
-                            else:
-                                st.write("**Scripts are in same length**")
-                            
+                    insights = visualization['insights']
+
+                    deviations_data = {
+                        'Axis': ['X', 'Y', 'Z'],
+                        'Max Deviations (mm)': [insights['max_deviation']['x'], 
+                                                insights['max_deviation']['y'], 
+                                                insights['max_deviation']['z']],
+                        'Mean Deviations (mm)': [insights['mean_deviation']['x'], 
+                                                insights['mean_deviation']['y'], 
+                                                insights['mean_deviation']['z']],
+                        'RMS Deviations (mm)': [insights['rms_deviation']['x'], 
+                                               insights['rms_deviation']['y'], 
+                                               insights['rms_deviation']['z']],
+                        'P95 Deviations (mm)': [insights['percentile_deviation']['p95']['x'], 
+                                               insights['percentile_deviation']['p95']['y'], 
+                                               insights['percentile_deviation']['p95']['z']]
+                    }
+
+                    df_deviations = pd.DataFrame(deviations_data)
+
+                    # Convert DataFrame to HTML table with custom CSS
+                    html_table = df_deviations.to_html(index=False, escape=False)
+
+                    # Custom CSS for table alignment
+                    table_style = """
+                        <style>
+                            table {
+                                width: 100%;
+                                text-align: center;
+                                margin-left: auto;
+                                margin-right: auto;
+                            }
+                            th, td {
+                                padding: 8px;
+                                text-align: center;
+                            }
+                        </style>
+                    """
+
+                    with col2:
+                        st.write("**Deviation Insights**")
+                        st.markdown(table_style, unsafe_allow_html=True)
+                        st.markdown(html_table, unsafe_allow_html=True)
+
+                    st.header("Visualization")
+                    show_chart(visualization['figure_3d_paths'], profiler, 'render_3d_paths')
+                    show_chart(visualization['figure_deviation_analysis'], profiler, 'render_deviation_analysis')
+
+                except Exception as e:
+                    st.error(f"Error generating visualizations: {str(e)}")
+
+                # Display scripts at the bottom: changed hunks first, full text only on request,
+                # and never more than one page of lines per rerun
+                st.header("Test Scripts")
+                master_script = test_case.get('master_script', 'No master script found')
+                test_script = test_case.get('test_script', 'No test script found')
+                with profiler.stage('script_diff') as record:
+                    script_diff = get_script_diff(data_key, test_case['script_ref'], master_script, test_script)
+                    record['lines'] = len(script_diff.master_lines) + len(script_diff.test_lines)
+
+                if script_diff.identical:
+                    st.write("**Master and test scripts are identical**")
                 else:
-                    col1, col2 = st.columns([4, 6])
-                    
-                    with col1:
-                        status_counts = filtered_df['status'].value_counts()
-                        total_count = len(filtered_df)
-                        
-                        fig_pie = px.pie(
-                            values=status_counts.values,
-                            names=status_counts.index,
-                            color=status_counts.index,
-                            title='Test Results Distribution',
-                            color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
-                            hole=0.3
+                    st.write(
+                        f"**Changes:** {len(script_diff.hunks)} hunks, "
+                        f"+{script_diff.added} / -{script_diff.removed} lines"
+                    )
+                    diff_pages = -(-script_diff.line_count // DIFF_PAGE_LINES)
+                    diff_page = 1
+                    if diff_pages > 1:
+                        diff_page = st.number_input(
+                            f"Diff page (of {diff_pages})", min_value=1, max_value=diff_pages, value=1,
+                            key=f"diff_page_{test_case['script_ref']}"
                         )
+                    st.code(script_diff.page(diff_page - 1, DIFF_PAGE_LINES), language='diff')
 
-                        fig_pie.update_traces(textinfo='label+value',pull=[0.05, 0.05])
-                        fig_pie.update_layout(
-                            showlegend=True,
-                            annotations=[{
-                                'text': f'Total: {total_count}',
-                                'x': 0.5, 'y': 0.5,
-                                'font_size': 15,
-                                'showarrow': False
-                            }]
+                if st.toggle("Show full scripts"):
+                    script_lines = max(len(script_diff.master_lines), len(script_diff.test_lines))
+                    script_pages = max(-(-script_lines // SCRIPT_PAGE_LINES), 1)
+                    script_page = 1
+                    if script_pages > 1:
+                        script_page = st.number_input(
+                            f"Script page (of {script_pages})", min_value=1, max_value=script_pages, value=1,
+                            key=f"script_page_{test_case['script_ref']}"
                         )
-                        st.plotly_chart(fig_pie, use_container_width=True)
-                    
-                    with col2:
-                        category_status = filtered_df.groupby(['category', 'status']).size().reset_index(name='count')
-                        fig_bar = px.bar(
-                            category_status,
-                            x='category',
-                            y='count',
-                            color='status',
-                            labels={'category': 'Test Category', 'count': 'Number of Tests'},
-                            title='Test Category Distribution by Status',
-                            color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
-                            barmode='stack'
+                    first_line = (script_page - 1) * SCRIPT_PAGE_LINES
+                    col_scripts1, col_scripts2 = st.columns(2)
+
+                    with col_scripts1:
+                        st.write("**Master Script:**")
+                        st.code("\n".join(script_diff.master_lines[first_line:first_line + SCRIPT_PAGE_LINES]), language='python')
+
+                    with col_scripts2:
+                        st.write("**Test Script:**")
+                        st.code("\n".join(script_diff.test_lines[first_line:first_line + SCRIPT_PAGE_LINES]), language='python')
+
+                # Get the 'diff_or_unequal_length_info' from test_case
+                diff_info = test_case.get('unequal_length_info', {})
+
+                if diff_info:
+                    extra_master_script = diff_info.get('extra_lines_in_file1', [])
+                    extra_test_script = diff_info.get('extra_lines_in_file2', [])
+                    formatted_master_script = "\n".join(extra_master_script) if extra_master_script else 'No extra lines found in Master Script.'
+                    formatted_test_script = "\n".join(extra_test_script) if extra_test_script else 'No extra lines found in Test Script.'
+
+                    with st.expander("Extra lines in scripts", expanded=False):
+                        col_scripts3, col_scripts4 = st.columns(2)
+
+                        with col_scripts3:
+                            st.write("**Extra lines on Master Script:**")
+                            st.code(formatted_master_script, language='python')
+
+                        with col_scripts4:
+                            st.write("**Extra lines on Test Script:**")
+                            st.code(formatted_test_script, language='python')
+                else:
+                    st.write("**Scripts are in same length**")
+
+                # Warm the cache with the next and previous tests of the category in the background
+                position = category_tests.index(selected_test)
+                for neighbour in category_tests[position + 1:position + 2] + category_tests[max(position - 1, 0):position]:
+                    neighbour_case = filter_index.test_record(
+                        neighbour, selected_dates, selected_status, selected_failure_types, selected_category
+                    )
+                    neighbour_key = (data_key, neighbour_case['script_ref'], max_plot_points)
+                    if neighbour_key not in visualization_cache:
+                        neighbour_case.update(scripts.get(neighbour_case['script_ref']))
+                        visualization_cache.prefetch(
+                            neighbour_key, partial(build_visualization, neighbour_case, max_plot_points or None)
                         )
-                        fig_bar.update_layout(bargap=0.2)
-                        st.plotly_chart(fig_bar, use_container_width=True)
-                        
-                    df['date'] = pd.to_datetime(df['date'], errors='coerce')
 
-                    if df['date'].isnull().any():
-                        st.warning("Some date values could not be converted properly.")
+    else:
+        col1, col2 = st.columns([4, 6])
+
+        with col1:
+            status_counts = count_by(rollup, 'status', [selected_dates]).sort_values(ascending=False)
+            status_counts = status_counts[status_counts > 0]
+            total_count = status_counts.sum()
+
+            fig_pie = px.pie(
+                values=status_counts.values,
+                names=status_counts.index,
+                color=status_counts.index,
+                title='Test Results Distribution',
+                color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
+                hole=0.3
+            )
+
+            fig_pie.update_traces(textinfo='label+value',pull=[0.05, 0.05])
+            fig_pie.update_layout(
+                showlegend=True,
+                annotations=[{
+                    'text': f'Total: {total_count}',
+                    'x': 0.5, 'y': 0.5,
+                    'font_size': 15,
+                    'showarrow': False
+                }]
+            )
+            show_chart(fig_pie, profiler, 'render_pie')
 
-                    trend_data = df.groupby(['date', 'status']).size().reset_index(name='count')
+        with col2:
+            category_status = count_by(rollup, ['category', 'status'], [selected_dates]).reset_index(name='count')
+            fig_bar = px.bar(
+                category_status,
+                x='category',
+                y='count',
+                color='status',
+                labels={'category': 'Test Category', 'count': 'Number of Tests'},
+                title='Test Category Distribution by Status',
+                color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
+                barmode='stack'
+            )
+            fig_bar.update_layout(bargap=0.2)
+            show_chart(fig_bar, profiler, 'render_bar')
 
-                    fig_trend = px.line(
-                        trend_data,
-                        x='date',
-                        y='count',
+        trend_data = count_by(rollup, ['date', 'status']).reset_index(name='count')
+        trend_data['date'] = pd.to_datetime(trend_data['date'], errors='coerce')
+
+        if trend_data['date'].isnull().any():
+            st.warning("Some date values could not be converted properly.")
+
+        trend_data = trend_data.sort_values('date')
+
+        fig_trend = px.line(
+            trend_data,
+            x='date',
+            y='count',
+            color='status',
+            color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
+            markers=True,
+            line_shape='linear'
+        )
+
+        fig_trend.update_layout(
+            yaxis_title='Number of Tests',
+            xaxis_title='Date',
+            xaxis=dict(
+                tickformat="%d-%m-%Y",
+                tickmode='array',
+            )
+        )
+
+        st.header("Trend of Test Results")
+        show_chart(fig_trend, profiler, 'render_trend')
+
+        st.header("Fleet Deviation Metrics")
+        if st.checkbox("Compute deviation metrics for every test in the log"):
+            fleet_progress = st.progress(0.0, text="Computing deviation metrics...")
+            with profiler.stage('fleet_insights', rows=len(df)):
+                fleet_metrics = compute_fleet_insights(
+                    scripts,
+                    df['script_ref'].tolist(),
+                    cache=get_fleet_cache(data_key),
+                    progress=lambda fraction: fleet_progress.progress(fraction, text="Computing deviation metrics...")
+                )
+            fleet_progress.empty()
+
+            fleet_df = df[['script_ref', 'testname', 'date', 'category', 'status']].join(
+                pd.DataFrame.from_dict(fleet_metrics, orient='index').reindex(columns=INSIGHT_COLUMNS), on='script_ref'
+            ).drop(columns='script_ref').sort_values('worst_deviation', ascending=False)
+            failed_tests = int(fleet_df['error'].notna().sum())
+            if failed_tests:
+                st.warning(f"Deviation metrics could not be computed for {failed_tests} test(s); see the error column.")
+
+            col_fleet1, col_fleet2 = st.columns([6, 4])
+            with col_fleet1:
+                st.write("**Worst Deviations (mm)**")
+                st.dataframe(fleet_df, use_container_width=True, hide_index=True)
+            with col_fleet2:
+                if fleet_df['worst_deviation'].isna().all():
+                    st.info("No test produced deviation metrics.")
+                else:
+                    fig_fleet = px.histogram(
+                        fleet_df,
+                        x='worst_deviation',
                         color='status',
-                        color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'},
-                        markers=True,
-                        line_shape='linear'
+                        nbins=50,
+                        labels={'worst_deviation': 'Worst Deviation (mm)'},
+                        title='Distribution of Worst Deviation',
+                        color_discrete_map={'Passed': '#90EE90', 'Failed': '#FFB6C1'}
                     )
+                    show_chart(fig_fleet, profiler, 'render_fleet_histogram')
 
-                    fig_trend.update_layout(
-                        yaxis_title='Number of Tests',
-                        xaxis_title='Date',
-                        xaxis=dict(
-                            tickformat="%d-%m-%Y",
-                            tickmode='array',
-                        )
-                    )
 
-                    st.header("Trend of Test Results")
-                    st.plotly_chart(fig_trend, use_container_width=True)
+def main(): 
+    st.set_page_config(layout="wide")
+    st.title("Test Case Report")
+
+    profiler = StageProfiler(
+        enabled=st.session_state.get('perf_enabled', False),
+        track_memory=st.session_state.get('perf_memory', False)
+    )
+    # tracemalloc is process-wide and runs only while a memory-tracked rerun is in
+    # progress, so a closed tab or an interrupted rerun never leaves it on
+    with profiler.tracing():
+        render_app(profiler)
+
+
+def render_app(profiler):
+    data_source = st.sidebar.radio("Data Source", ['Upload file', 'Log store'], horizontal=True)
+    if data_source == 'Log store':
+        render_log_store(profiler)
+        render_performance_panel(profiler)
+        return
+
+    # File uploader
+    uploaded_file = st.sidebar.file_uploader("Upload LOG file", type=['json'])
+    # local_file = r"C:\mac\aug\QA_dashboard\test_logs\test_log_file.json"  
+
+    if uploaded_file is not None:
+        try:
+            if uploaded_file.size:
+                # Reruns reuse the enriched frame; only a new upload pays the ingest cost
+                file_hash = upload_hash(uploaded_file, profiler)
+                df, scripts = get_log_cache().get_or_load(
+                    file_hash, lambda scripts: ingest_log(uploaded_file, scripts, profiler)
+                )
+                st.sidebar.success("JSON file loaded successfully!")
+                render_dashboard(
+                    get_filter_index(file_hash, df).dates,
+                    lambda day: (df, scripts, file_hash),
+                    get_rollup(file_hash, df),
+                    profiler
+                )
                 
      
             else:
@@ -264,8 +562,9 @@ def main():
         except Exception as e:
             # Catch any other unexpected errors
             st.sidebar.error(f"An error occurred: {str(e)}")
-        
-        
+
+    render_performance_panel(profiler)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+"""Synthetic robot test log generator for benchmarks.
+
+    python benchmarks/generate_logs.py synthetic.json --tests 100000 --days 14 --moves 50
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+CATEGORIES = ['Weld', 'Pick', 'Pallet', 'Paint', 'Assembly']
+PASS_STATUS = "✅ PASS"
+THRESHOLD_STATUS = "❌ FAIL: Deviation above threshold."
+UNEQUAL_STATUS = "❌ FAIL: Files have unequal lengths."
+
+
+def make_script(moves):
+    # One CalcRobT target plus a MoveL per move, like the recorded RAPID programs
+    lines = ['MODULE Synthetic', '  PROC main()']
+    for i, (x, y, z) in enumerate(moves):
+        lines.append(f'    p{i} := CalcRobT([[{x:.3f},{y:.3f},{z:.3f}],[1,0,0,0],[0,0,0,0]], tool0);')
+        lines.append(f'    MoveL p{i}, v200, z10, tool0;')
+    lines.extend(['  ENDPROC', 'ENDMODULE'])
+    return '\n'.join(lines)
+
+
+def make_program(rng, moves):
+    # A smooth random 3D path (mm)
+    steps = rng.normal(scale=5.0, size=(moves, 3)).cumsum(axis=0)
+    return steps + rng.uniform(-500, 500, size=3)
+
+
+def generate_log(path, tests=1000, days=7, moves=50, fail_ratio=0.3, unequal_ratio=0.3,
+                 programs=50, variants=5, seed=0):
+    # Streams the JSON array to path so even 10^6 tests never sit in memory at once.
+    # fail_ratio: share of failed tests; unequal_ratio: share of failures that are
+    # "Files have unequal lengths" (the rest fail the deviation threshold).
+    rng = np.random.default_rng(seed)
+    pool = []
+    for program in range(programs):
+        master = make_program(rng, moves)
+        master_script = make_script(master)
+        jittered = [make_script(master + rng.normal(scale=1.5, size=master.shape)) for _ in range(variants)]
+        unequal = []
+        for _ in range(variants):
+            extra = int(rng.integers(1, max(2, moves // 10) + 1))
+            position = int(rng.integers(0, moves))
+            test_moves = np.insert(master, position, master[position] + rng.normal(scale=20, size=(extra, 3)), axis=0)
+            unequal.append((make_script(test_moves), extra))
+        pool.append((CATEGORIES[program % len(CATEGORIES)], master_script, jittered, unequal))
+
+    start = datetime(2024, 1, 1, 6, 0, 0)
+    seconds_per_test = days * 86400 / max(tests, 1)
+    kinds = rng.choice(3, size=tests, p=[1 - fail_ratio, fail_ratio * (1 - unequal_ratio), fail_ratio * unequal_ratio])
+    program_ids = rng.integers(0, programs, size=tests)
+    variant_ids = rng.integers(0, variants, size=tests)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i in range(tests):
+            category, master_script, jittered, unequal = pool[program_ids[i]]
+            record = {
+                'testname': f'{category} program_{program_ids[i]} run_{i}',
+                'startdate': (start + timedelta(seconds=i * seconds_per_test)).strftime('%Y-%m-%d %H:%M:%S'),
+                'master_script': master_script,
+                'unequal_length_info': {}
+            }
+            if kinds[i] == 0:
+                record.update(test_status=PASS_STATUS, test_script=master_script)
+            elif kinds[i] == 1:
+                record.update(test_status=THRESHOLD_STATUS, test_script=jittered[variant_ids[i]])
+            else:
+                test_script, extra = unequal[variant_ids[i]]
+                record.update(
+                    test_status=UNEQUAL_STATUS,
+                    test_script=test_script,
+                    unequal_length_info={
+                        'extra_lines_in_file1': [],
+                        'extra_lines_in_file2': test_script.splitlines()[2:2 + 2 * extra]
+                    }
+                )
+            if i:
+                f.write(',\n')
+            json.dump(record, f, ensure_ascii=False)
+        f.write(']')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic robot test log.")
+    parser.add_argument('path', help="Output JSON file")
+    parser.add_argument('--tests', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--moves', type=int, default=50, help="CalcRobT moves per script")
+    parser.add_argument('--fail-ratio', type=float, default=0.3)
+    parser.add_argument('--unequal-ratio', type=float, default=0.3, help="Share of failures with unequal lengths")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_log(args.path, args.tests, args.days, args.moves, args.fail_ratio, args.unequal_ratio, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Per-stage timing and memory benchmarks on synthetic logs.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --out bench_results.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare bench_results.json
+
+Stages: JSON load, DataFrame enrichment, the sidebar filter cascade, coordinate
+extraction, insights reports and figure construction. Per-test stages run on a
+sample of tests; a separate "long" case times one long master/test pair, and an
+"enrichment" case times the legacy per-row classification against the
+vectorized one (default 1M rows). Times come from untraced runs; peak memory
+from a separate run under tracemalloc.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from essentials import RobotPathVisualizer, RobotScriptParser  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+from generate_logs import generate_log, make_program, make_script  # noqa: E402
+from log_loader import enrich_dataframe, get_failure_type, read_frame  # noqa: E402
+from script_store import ScriptStore  # noqa: E402
+
+
+class StageRunner:
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.results = []
+
+    def run(self, size, stage, func, items=None, setup=None):
+        # Timed without tracemalloc, whose overhead differs widely between stages; peak
+        # memory comes from a second, traced run. setup() builds fresh untimed inputs for
+        # each run, so memoized or consumed state never leaks from one run into the other.
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        value = func(*args)
+        seconds = time.perf_counter() - start
+        peak = None
+        if self.track_memory:
+            args = () if setup is None else (setup(),)
+            tracemalloc.start()
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        result = {'size': size, 'stage': stage, 'seconds': round(seconds, 6), 'peak_bytes': peak,
+                  'items': items(value) if callable(items) else items}
+        self.results.append(result)
+        peak_text = f"{peak / 2**20:9.1f} MiB" if peak is not None else ''
+        print(f"{str(size):>9} {stage:<34} {seconds:10.4f}s {peak_text}")
+        return value
+
+
+def filter_cascade(index):
+    # Walk the sidebar the way a user would: every date x status, each category, first test
+    lookups = 0
+    for day in index.dates:
+        index.positions(day)
+        for status, failure_types in (('Passed', None), ('Failed', ['Files have unequal lengths', 'Fail due to threshold'])):
+            for category in index.categories(day, status, failure_types):
+                names = index.testnames(day, status, failure_types, category)
+                index.test_record(names[0], day, status, failure_types, category)
+                lookups += 1
+    return lookups
+
+
+def sample_test_cases(df, scripts, count, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(df), size=min(count, len(df)), replace=False)
+    test_cases = []
+    for position in positions:
+        test_case = df.iloc[position].to_dict()
+        test_case.update(scripts.get(test_case['script_ref']))
+        test_cases.append(test_case)
+    return test_cases
+
+
+def load_frame(path):
+    scripts = ScriptStore()
+    with open(path, 'rb') as f:
+        return read_frame(f, scripts=scripts), scripts
+
+
+def fresh_visualizers(test_cases, insights=False, **kwargs):
+    # Visualizers memoize their work, so every timed run gets new ones
+    visualizers = [RobotPathVisualizer(test_case, **kwargs) for test_case in test_cases]
+    if insights:
+        for visualizer in visualizers:
+            visualizer.generate_insights_report()
+    return visualizers
+
+
+def bench_size(runner, size, path, sample, figure_sample):
+    raw, scripts = runner.run(size, 'json_load', lambda: load_frame(path), lambda value: len(value[0]))
+    df = runner.run(size, 'enrichment', enrich_dataframe, len, setup=raw.copy)
+    index = runner.run(size, 'filter_index_build', lambda: FilterIndex(df), lambda index: len(index.dates))
+    runner.run(size, 'filter_cascade', lambda: filter_cascade(index), lambda lookups: lookups)
+
+    test_cases = sample_test_cases(df, scripts, sample)
+    script_texts = [text for test_case in test_cases for text in (test_case['master_script'], test_case['test_script'])]
+    runner.run(size, 'extract_coordinates', lambda: [RobotScriptParser.extract_coordinates(text) for text in script_texts],
+               len)
+    runner.run(size, 'generate_insights_report', lambda vs: [v.generate_insights_report() for v in vs], len,
+               setup=lambda: fresh_visualizers(test_cases))
+    figure_cases = test_cases[:figure_sample]
+    runner.run(size, 'plot_3d_paths', lambda vs: [v.plot_3d_paths() for v in vs], len,
+               setup=lambda: fresh_visualizers(figure_cases, insights=True))
+    runner.run(size, 'plot_deviation_analysis', lambda vs: [v.plot_deviation_analysis() for v in vs], len,
+               setup=lambda: fresh_visualizers(figure_cases, insights=True))
+
+
+def bench_long(runner, moves, max_points):
+    # One long master/test pair, equal length (index) and with inserted moves (DTW)
+    rng = np.random.default_rng(1)
+    master = make_program(rng, moves)
+    test = master + rng.normal(scale=1.5, size=master.shape)
+    inserted = np.insert(test, moves // 2, test[moves // 2] + 20, axis=0)
+    master_script, test_script, inserted_script = make_script(master), make_script(test), make_script(inserted)
+    label = f'long:{moves}'
+    runner.run(label, 'extract_coordinates', lambda: RobotScriptParser.extract_coordinates(master_script), len)
+    for case, other_script in (('index', test_script), ('dtw', inserted_script)):
+        test_cases = [{'master_script': master_script, 'test_script': other_script}]
+        runner.run(label, f'generate_insights_report:{case}', lambda vs: vs[0].generate_insights_report(),
+                   setup=lambda: fresh_visualizers(test_cases, max_points=max_points))
+        runner.run(label, f'plot_3d_paths:{case}', lambda vs: vs[0].plot_3d_paths(),
+                   setup=lambda: fresh_visualizers(test_cases, insights=True, max_points=max_points))
+        fig = runner.run(label, f'plot_deviation_analysis:{case}', lambda vs: vs[0].plot_deviation_analysis(),
+                         setup=lambda: fresh_visualizers(test_cases, insights=True, max_points=max_points))
+        runner.run(label, f'figure_to_json:{case}', fig.to_json, len)
+
+
+def legacy_enrich(df):
+    # The per-row .apply classification enrich_dataframe replaced
+    df['startdate'] = pd.to_datetime(df['startdate'])
+    df['date'] = df['startdate'].dt.date
+    df['status'] = df['test_status'].apply(lambda x: 'Failed' if 'FAIL' in x else 'Passed')
+    df['category'] = df['testname'].apply(lambda x: x.split(' ')[0] if x else 'Unknown')
+    df['failure_type'] = df['test_status'].apply(get_failure_type)
+    return df
+
+
+def bench_enrichment(runner, rows, days):
+    # Only the columns enrichment reads, so 1M rows need no generated JSON log
+    rng = np.random.default_rng(2)
+    statuses = np.array(['\u2705 PASS', '\u274c FAIL: Files have unequal lengths.', '\u274c FAIL: Deviation over threshold.'],
+                        dtype=object)
+    categories = np.array(['Weld', 'Pick', 'Place', 'Glue', 'Inspect'], dtype=object)
+    raw = pd.DataFrame({
+        'testname': categories[rng.integers(len(categories), size=rows)] + ' program_' + rng.integers(50, size=rows).astype(str),
+        'startdate': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400 * days, size=rows), unit='s')).astype(str),
+        'test_status': statuses[rng.integers(len(statuses), size=rows)],
+    })
+    label = f'enrich:{rows}'
+    legacy = runner.run(label, 'enrichment:legacy_apply', legacy_enrich, len, setup=raw.copy)
+    enriched = runner.run(label, 'enrichment:vectorized', enrich_dataframe, len, setup=raw.copy)
+    for column in ('status', 'category', 'failure_type'):
+        if not enriched[column].astype(object).equals(legacy[column].astype(object).fillna(np.nan)):
+            raise AssertionError(f"vectorized {column} differs from the legacy classification")
+    # 'seconds' is always the untraced run; traced times would mostly measure tracemalloc
+    legacy_seconds, vectorized_seconds = (result['seconds'] for result in runner.results[-2:])
+    print(f"{label:>9} {'enrichment speedup':<34} {legacy_seconds / vectorized_seconds:9.1f}x")
+
+
+def metadata(args):
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'args': vars(args)
+    }
+
+
+def compare(results, previous_path):
+    # Print the time ratio against an earlier results file, stage by stage
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(str(r['size']), r['stage']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path} (ratio > 1 is slower):")
+    for result in results:
+        before = previous.get((str(result['size']), result['stage']))
+        if before and before['seconds']:
+            print(f"{str(result['size']):>9} {result['stage']:<34} {result['seconds'] / before['seconds']:6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline on synthetic logs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help="Tests per log")
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--moves', type=int, default=20, help="CalcRobT moves per script in the logs")
+    parser.add_argument('--fail-ratio', type=float, default=0.3)
+    parser.add_argument('--unequal-ratio', type=float, default=0.3)
+    parser.add_argument('--sample', type=int, default=200, help="Tests sampled for per-test stages")
+    parser.add_argument('--figure-sample', type=int, default=20, help="Tests sampled for figure stages")
+    parser.add_argument('--long-moves', type=int, default=20000, help="Moves in the long-path case (0 = skip)")
+    parser.add_argument('--max-points', type=int, default=5000, help="Plot point budget for the long-path case")
+    parser.add_argument('--enrichment-rows', type=int, default=1000000,
+                        help="Rows in the legacy vs vectorized enrichment case (0 = skip)")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'),
+                        help="Where generated logs are cached between runs")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak-memory runs")
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    runner = StageRunner(track_memory=not args.no_memory)
+    for size in args.sizes:
+        path = os.path.join(
+            args.data_dir,
+            f'log_{size}_d{args.days}_m{args.moves}_f{args.fail_ratio}_u{args.unequal_ratio}.json'
+        )
+        if not os.path.exists(path):
+            print(f"Generating {path} ...")
+            generate_log(path, size, args.days, args.moves, args.fail_ratio, args.unequal_ratio)
+        bench_size(runner, size, path, args.sample, args.figure_sample)
+    if args.long_moves:
+        bench_long(runner, args.long_moves, args.max_points or None)
+    if args.enrichment_rows:
+        bench_enrichment(runner, args.enrichment_rows, args.days)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': metadata(args), 'results': runner.results}, f, indent=1)
+    print(f"Results written to {args.out}")
+    if args.compare:
+        compare(runner.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,264 @@
 import plotly.graph_objects as go
 import numpy as np
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import re
+from functools import cached_property
 from plotly.subplots import make_subplots
+from perf import NULL_PROFILER, figure_points, profiled_method
 
 
 class RobotScriptParser:
+    # Only the first three components (x, y, z) of each CalcRobT target are kept
+    PATTERN = re.compile(r'CalcRobT\(\[\[([^,\]\n]*,[^,\]\n]*,[^,\]\n]*)[^\]\n]*\]')
+
+    @staticmethod
+    def _to_array(coords):
+        # One float conversion for all matches, straight into a contiguous (N, 3) array
+        if not coords:
+            return np.empty((0, 3), dtype=np.float64)
+        return np.array(','.join(coords).split(','), dtype=np.float64).reshape(-1, 3)
+
     @staticmethod
     def extract_coordinates(script_content):
-        pattern = r'CalcRobT\(\[\[(.*?)\]'
-        moves = []
-        matches = re.finditer(pattern, script_content)
-        for match in matches:
-            coords_str = match.group(1)
-            coords = [float(x) for x in coords_str.split(',')[:3]]
-            moves.append(coords)
-        return moves
+        return RobotScriptParser._to_array(RobotScriptParser.PATTERN.findall(script_content))
+
+    @staticmethod
+    def extract_coordinates_batch(scripts):
+        # Parse many scripts with a single conversion; returns one (N_i, 3) view per script
+        coords = []
+        counts = []
+        for script_content in scripts:
+            matches = RobotScriptParser.PATTERN.findall(script_content) if script_content else []
+            coords.extend(matches)
+            counts.append(len(matches))
+        moves = RobotScriptParser._to_array(coords)
+        return np.split(moves, np.cumsum(counts)[:-1]) if counts else []
+
+class PathDecimator:
+    # Level-of-detail helpers that shrink long trajectories to a point budget
+
+    @staticmethod
+    def lttb_indices(points, budget, keep=None):
+        # Largest-Triangle-Three-Buckets over (N, 3) points: per bucket keep the point
+        # spanning the largest triangle with the previous pick and the next bucket's mean.
+        # Indices in keep (e.g. peak deviations) are always retained.
+        n = len(points)
+        if budget is None or n <= budget or budget < 3:
+            return np.arange(n)
+        edges = np.linspace(1, n - 1, budget - 1).astype(int)
+        selected = np.empty(budget, dtype=np.int64)
+        selected[0] = 0
+        anchor = 0
+        for bucket in range(budget - 2):
+            start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+            if bucket + 2 < len(edges):
+                next_point = points[edges[bucket + 1]:max(edges[bucket + 2], edges[bucket + 1] + 1)].mean(axis=0)
+            else:
+                next_point = points[-1]
+            candidates = points[start:end] - points[anchor]
+            areas = np.linalg.norm(np.cross(candidates, next_point - points[anchor]), axis=1)
+            anchor = start + int(np.argmax(areas))
+            selected[bucket + 1] = anchor
+        selected[-1] = n - 1
+        if keep is not None and len(keep):
+            keep = np.asarray(keep)
+            selected = np.union1d(selected, keep[(keep >= 0) & (keep < n)])
+        return np.unique(selected)
+
+    @staticmethod
+    def bin_edges(n, budget):
+        return np.linspace(0, n, min(budget, n) + 1).astype(int)
+
+    @staticmethod
+    def bin_argmax(values, edges):
+        # Index of the largest value in each bin, so per-bin peaks are never lost
+        bin_ids = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+        order = np.lexsort((-values, bin_ids))
+        return order[edges[:-1]]
+
+    @staticmethod
+    def bin_extreme(values, edges):
+        # Signed value with the largest magnitude in each bin, per column
+        columns = [values[PathDecimator.bin_argmax(np.abs(values[:, col]), edges), col]
+                   for col in range(values.shape[1])]
+        return np.column_stack(columns)
+
+
+class PathAligner:
+    # Sakoe-Chiba banded dynamic time warping over (N, 3) coordinate arrays.
+    # Row i of the cost matrix only covers a fixed-width window of test moves around
+    # the diagonal, so memory is one int8 back-pointer per band cell (N x band).
+    DEFAULT_BAND = 100
+    BLOCK_ROWS = 1024
+
+    @staticmethod
+    def _window_starts(n, m, width, half_width):
+        if n == 1:
+            centers = np.zeros(1, dtype=np.int64)
+        else:
+            centers = np.rint(np.arange(n) * ((m - 1) / (n - 1))).astype(np.int64)
+        return np.clip(centers - half_width, 0, m - width)
+
+    @staticmethod
+    def dtw_indices(master, test, band=None):
+        # Returns (master_idx, test_idx) of the optimal warping path under the band
+        n, m = len(master), len(test)
+        if not n or not m:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        band = PathAligner.DEFAULT_BAND if band is None else band
+        # The band must cover the diagonal's slope or the path could not stay connected
+        half_width = max(band, -(-m // n) + 1)
+        width = min(2 * half_width + 1, m)
+        starts = PathAligner._window_starts(n, m, width, half_width)
+        window = np.arange(width)
+        # 0 = diagonal, 1 = up (previous master move), 2 = left (previous test move)
+        pointers = np.empty((n, width), dtype=np.int8)
+        padded = np.full(2 * width + 2, np.inf)
+        previous = None
+        for block_start in range(0, n, PathAligner.BLOCK_ROWS):
+            block = slice(block_start, min(block_start + PathAligner.BLOCK_ROWS, n))
+            columns = starts[block, None] + window
+            costs = np.linalg.norm(test[columns] - master[block, None, :], axis=2)
+            for offset, cost in enumerate(costs):
+                i = block_start + offset
+                if previous is None:
+                    reach = np.full(width, np.inf)
+                    reach[0] = cost[0]
+                    from_up = np.zeros(width, dtype=bool)
+                else:
+                    shift = starts[i] - starts[i - 1]
+                    padded[1:width + 1] = previous
+                    padded[width + 1:] = np.inf
+                    diagonal = padded[shift:shift + width]
+                    up = padded[shift + 1:shift + width + 1]
+                    from_up = up < diagonal
+                    reach = cost + np.where(from_up, up, diagonal)
+                # Left moves within the row: D[k] = S[k] + min_{l<=k}(reach[l] - S[l])
+                prefix = np.cumsum(cost)
+                entry = reach - prefix
+                best_entry = np.minimum.accumulate(entry)
+                previous = best_entry + prefix
+                row_pointers = from_up.astype(np.int8)
+                row_pointers[best_entry < entry] = 2
+                pointers[i] = row_pointers
+        return PathAligner._backtrack(pointers, starts, n, m)
+
+    @staticmethod
+    def _backtrack(pointers, starts, n, m):
+        master_idx = np.empty(n + m, dtype=np.int64)
+        test_idx = np.empty(n + m, dtype=np.int64)
+        i, j, length = n - 1, m - 1, 0
+        while True:
+            master_idx[length], test_idx[length] = i, j
+            length += 1
+            if i == 0 and j == 0:
+                break
+            pointer = pointers[i, j - starts[i]]
+            if pointer == 0:
+                i, j = i - 1, j - 1
+            elif pointer == 1:
+                i -= 1
+            else:
+                j -= 1
+        return master_idx[length - 1::-1].copy(), test_idx[length - 1::-1].copy()
+
 
 class RobotPathVisualizer:
-    def __init__(self, test_case):
-        parser = RobotScriptParser()
-        self.master_moves = parser.extract_coordinates(test_case['master_script'])
-        self.test_moves = parser.extract_coordinates(test_case['test_script'])
+    def __init__(self, test_case, max_points=None, alignment='auto', band=None, profiler=None):
+        # max_points caps the points sent per trace / heatmap rows; None keeps full detail.
+        # alignment: 'index' compares moves by position, 'dtw' pairs them with banded DTW,
+        # 'auto' uses DTW only when the two paths have different lengths.
+        # profiler: optional perf.StageProfiler timing parse, alignment, report and figures.
+        self.max_points = max_points
+        self.alignment = alignment
+        self.band = band
+        self.profiler = profiler or NULL_PROFILER
+        with self.profiler.stage('coordinate_extraction') as record:
+            self.master_moves, self.test_moves = RobotScriptParser.extract_coordinates_batch(
+                [test_case['master_script'], test_case['test_script']]
+            )
+            record['points'] = len(self.master_moves) + len(self.test_moves)
         self.test_name = test_case.get('testname', 'Unknown Test')
         self.test_date = test_case.get('startdate', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         self.test_status = test_case.get('test_status', '')
 
+    # Shared state: every plot and report reads these, each computed at most once
+
+    @property
+    def master_array(self):
+        return self.master_moves
+
+    @property
+    def test_array(self):
+        return self.test_moves
+
+    @property
+    def uses_dtw(self):
+        if self.alignment == 'auto':
+            return len(self.master_moves) != len(self.test_moves)
+        return self.alignment == 'dtw'
+
+    @cached_property
+    @profiled_method('alignment', lambda self, pairs: {'points': len(pairs[0]), 'dtw': self.uses_dtw})
+    def aligned_indices(self):
+        # (master_idx, test_idx) of compared move pairs
+        if self.uses_dtw:
+            return PathAligner.dtw_indices(self.master_moves, self.test_moves, self.band)
+        min_len = min(len(self.master_moves), len(self.test_moves))
+        indices = np.arange(min_len)
+        return indices, indices
+
+    @cached_property
+    def deviations(self):
+        master_idx, test_idx = self.aligned_indices
+        return self.master_moves[master_idx] - self.test_moves[test_idx]
+
+    @cached_property
+    def abs_deviations(self):
+        return np.abs(self.deviations)
+
+    @cached_property
+    def deviation_stats(self):
+        # Per-axis statistics of the absolute deviations, as (3,) arrays in X, Y, Z order
+        abs_deviations = self.abs_deviations
+        if not len(abs_deviations):
+            nan = np.full(3, np.nan)
+            return {'max': nan, 'mean': nan, 'rms': nan, 'p50': nan, 'p95': nan, 'p99': nan, 'abs_max': np.nan}
+        p50, p95, p99 = np.percentile(abs_deviations, [50, 95, 99], axis=0)
+        max_per_axis = abs_deviations.max(axis=0)
+        return {
+            'max': max_per_axis,
+            'mean': abs_deviations.mean(axis=0),
+            'rms': np.sqrt(np.mean(np.square(self.deviations), axis=0)),
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+            'abs_max': max_per_axis.max()
+        }
+
+    @cached_property
+    def peak_deviation_indices(self):
+        # Positions (into deviations) of the per-axis and overall largest deviations
+        if not len(self.deviations):
+            return np.empty(0, dtype=np.int64)
+        peaks = np.append(self.abs_deviations.argmax(axis=0), np.linalg.norm(self.deviations, axis=1).argmax())
+        return np.unique(peaks)
+
+    def _is_decimated(self, n):
+        return self.max_points is not None and n > self.max_points
+
+    @profiled_method('figure_3d_paths', lambda self, fig: figure_points(fig))
     def plot_3d_paths(self):
-        master_array = np.array(self.master_moves)
-        test_array = np.array(self.test_moves)
+        master_array = self.master_array
+        test_array = self.test_array
+        if self._is_decimated(max(len(master_array), len(test_array))):
+            master_idx, test_idx = self.aligned_indices
+            peaks = self.peak_deviation_indices
+            master_array = master_array[PathDecimator.lttb_indices(master_array, self.max_points, master_idx[peaks])]
+            test_array = test_array[PathDecimator.lttb_indices(test_array, self.max_points, test_idx[peaks])]
         
         fig = go.Figure()
         
@@ -72,11 +302,24 @@ class RobotPathVisualizer:
         
         return fig
 
+    @profiled_method('figure_deviation_analysis', lambda self, fig: figure_points(fig))
     def plot_deviation_analysis(self):
-        min_len = min(len(self.master_moves), len(self.test_moves))
-        master_array = np.array(self.master_moves[:min_len])
-        test_array = np.array(self.test_moves[:min_len])
-        deviations = master_array - test_array
+        deviations = self.deviations
+        abs_deviations = self.abs_deviations
+        abs_max = self.deviation_stats['abs_max']
+        master_idx, test_idx = self.aligned_indices
+        move_numbers = master_idx + 1
+        edges = None
+        if self._is_decimated(len(deviations)):
+            # Binned aggregation: each bin keeps its extreme value so no outlier is hidden
+            edges = PathDecimator.bin_edges(len(deviations), self.max_points)
+            deviations = PathDecimator.bin_extreme(deviations, edges)
+            unit = 'Pairs' if self.uses_dtw else 'Moves'
+            heatmap_labels = [f'{unit} {start+1}-{end}' for start, end in zip(edges[:-1], edges[1:])]
+        elif self.uses_dtw:
+            heatmap_labels = [f'Move {m+1} / {t+1}' for m, t in zip(master_idx, test_idx)]
+        else:
+            heatmap_labels = [f'Move {i+1}' for i in range(len(deviations))]
         
         fig = make_subplots(
             rows=1, cols=2,
@@ -88,9 +331,11 @@ class RobotPathVisualizer:
         
         # Plot absolute deviations per axis
         for idx, axis in enumerate(['X', 'Y', 'Z']):
+            axis_positions = slice(None) if edges is None else PathDecimator.bin_argmax(abs_deviations[:, idx], edges)
             fig.add_trace(
                 go.Scatter(
-                    y=np.abs(deviations[:, idx]),
+                    x=move_numbers[axis_positions],
+                    y=abs_deviations[axis_positions, idx],
                     mode='lines+markers',
                     name=f'{axis}-axis',
                     showlegend=True
@@ -103,11 +348,11 @@ class RobotPathVisualizer:
             go.Heatmap(
                 z=deviations,
                 x=['X', 'Y', 'Z'],
-                y=[f'Move {i+1}' for i in range(len(deviations))],
+                y=heatmap_labels,
                 colorscale='RdBu',
                 zmid=0,
                 colorbar=dict(
-                    tickvals=[-np.max(np.abs(deviations)), 0, np.max(np.abs(deviations))],  # Show min, mid, and max ticks
+                    tickvals=[-abs_max, 0, abs_max],  # Show min, mid, and max ticks
                     ticktext=['Low', '0', 'High'],  # Customize the colorbar ticks
                     len=0.6 # Length of the colorbar
                 ),
@@ -148,24 +393,94 @@ class RobotPathVisualizer:
         
         return fig
 
+    @profiled_method('insights', lambda self, report: {'points': report['compared_moves']})
     def generate_insights_report(self):
-        min_len = min(len(self.master_moves), len(self.test_moves))
-        master_array = np.array(self.master_moves[:min_len])
-        test_array = np.array(self.test_moves[:min_len])
-        deviations = master_array - test_array
-        
+        stats = self.deviation_stats
+
+        def per_axis(values):
+            return {'x': values[0], 'y': values[1], 'z': values[2]}
+
         return {
             'test_name': self.test_name,
             'test_date': self.test_date,
             'test_status': self.test_status,
-            'max_deviation': {
-                'x': np.max(np.abs(deviations[:, 0])),
-                'y': np.max(np.abs(deviations[:, 1])),
-                'z': np.max(np.abs(deviations[:, 2]))
-            },
-            'mean_deviation': {
-                'x': np.mean(np.abs(deviations[:, 0])),
-                'y': np.mean(np.abs(deviations[:, 1])),
-                'z': np.mean(np.abs(deviations[:, 2]))
+            'alignment': 'dtw' if self.uses_dtw else 'index',
+            'compared_moves': len(self.deviations),
+            'max_deviation': per_axis(stats['max']),
+            'mean_deviation': per_axis(stats['mean']),
+            'rms_deviation': per_axis(stats['rms']),
+            'percentile_deviation': {
+                'p50': per_axis(stats['p50']),
+                'p95': per_axis(stats['p95']),
+                'p99': per_axis(stats['p99'])
             }
         }
+
+
+# Every column a compute_insights row can have; tests that fail to parse only carry 'error'
+INSIGHT_COLUMNS = ['compared_moves', 'worst_deviation'] + [
+    f'{metric}_{axis}' for metric in ('max', 'mean', 'rms', 'p95') for axis in ('x', 'y', 'z')
+] + ['error']
+
+
+def compute_insights(test_case):
+    # Flat metrics row for one test, as used by the fleet table and batch reports
+    report = RobotPathVisualizer(test_case).generate_insights_report()
+    row = {
+        'compared_moves': report['compared_moves'],
+        'worst_deviation': float(max(report['max_deviation'].values()))
+    }
+    for metric, values in (('max', report['max_deviation']),
+                           ('mean', report['mean_deviation']),
+                           ('rms', report['rms_deviation']),
+                           ('p95', report['percentile_deviation']['p95'])):
+        for axis, value in values.items():
+            row[f'{metric}_{axis}'] = float(value)
+    return row
+
+
+_worker_scripts = None
+
+
+def _init_fleet_worker(scripts):
+    # Each worker receives the (picklable, mmap-backed) ScriptStore once
+    global _worker_scripts
+    _worker_scripts = scripts
+
+
+def _fleet_insights_chunk(script_refs, scripts=None):
+    scripts = scripts if scripts is not None else _worker_scripts
+    rows = {}
+    for script_ref in script_refs:
+        try:
+            rows[script_ref] = compute_insights(scripts.get(script_ref))
+        except Exception as e:
+            rows[script_ref] = {'error': str(e)}
+    return rows
+
+
+def compute_fleet_insights(scripts, script_refs, cache=None, max_workers=None, chunk_size=64,
+                           min_parallel=256, progress=None):
+    # Deviation metrics for many tests, fanned out over a process pool.
+    # cache maps script_ref -> metrics row; only missing refs are computed and the
+    # cache is filled in place. Returns {script_ref: row} for the requested refs.
+    cache = {} if cache is None else cache
+    pending = [int(script_ref) for script_ref in script_refs if int(script_ref) not in cache]
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(pending) < min_parallel or max_workers == 1:
+        # Small batches are not worth the pool start-up cost
+        for done, chunk in enumerate(chunks, 1):
+            cache.update(_fleet_insights_chunk(chunk, scripts))
+            if progress:
+                progress(done / len(chunks))
+    else:
+        # Spawned, not forked: callers such as the Streamlit server are multi-threaded
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_fleet_worker, initargs=(scripts,)) as executor:
+            futures = [executor.submit(_fleet_insights_chunk, chunk) for chunk in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                cache.update(future.result())
+                if progress:
+                    progress(done / len(futures))
+    return {int(script_ref): cache[int(script_ref)] for script_ref in script_refs}
@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+FILTER_KEYS = ['date', 'status', 'failure_type', 'category']
+
+
+class FilterIndex:
+    # Row positions grouped once by (date, status, failure_type, category) so the
+    # sidebar cascade can look up options and rows in O(result) instead of
+    # re-masking the whole DataFrame at every level.
+    def __init__(self, df):
+        self.df = df
+        self._testnames = df['testname'].to_numpy()
+        self._by_date = defaultdict(list)
+        groups = df.groupby(FILTER_KEYS, observed=True, dropna=False, sort=False).indices
+        for (date, status, failure_type, category), positions in groups.items():
+            failure_type = None if pd.isna(failure_type) else failure_type
+            self._by_date[date].append((status, failure_type, category, positions))
+        # Keep groups in order of first appearance, matching Series.unique() ordering
+        for date_groups in self._by_date.values():
+            date_groups.sort(key=lambda group: group[3][0])
+        self.dates = sorted(self._by_date)
+
+    def _groups(self, date, status=None, failure_types=None, category=None):
+        for group_status, group_failure_type, group_category, positions in self._by_date.get(date, []):
+            if status is not None and group_status != status:
+                continue
+            if failure_types and group_failure_type not in failure_types:
+                continue
+            if category is not None and group_category != category:
+                continue
+            yield group_category, positions
+
+    def positions(self, date, status=None, failure_types=None, category=None):
+        # Sorted row positions matching the selection; an empty failure_types list means no filter
+        matches = [positions for _, positions in self._groups(date, status, failure_types, category)]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return matches[0] if len(matches) == 1 else np.sort(np.concatenate(matches))
+
+    def rows(self, date, status=None, failure_types=None, category=None):
+        return self.df.iloc[self.positions(date, status, failure_types, category)]
+
+    def categories(self, date, status=None, failure_types=None):
+        groups = sorted(self._groups(date, status, failure_types), key=lambda group: group[1][0])
+        return list(dict.fromkeys(category for category, _ in groups))
+
+    def testnames(self, date, status=None, failure_types=None, category=None):
+        return self._testnames[self.positions(date, status, failure_types, category)].tolist()
+
+    def test_record(self, testname, date, status=None, failure_types=None, category=None):
+        # First matching row for the selected test, as a plain dict
+        positions = self.positions(date, status, failure_types, category)
+        matches = positions[self._testnames[positions] == testname]
+        return self.df.iloc[matches[0]].to_dict() if len(matches) else None
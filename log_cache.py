@@ -0,0 +1,80 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from script_store import ScriptStore
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+
+class LogFrameCache:
+    # In-memory LRU of (enriched log DataFrame, ScriptStore) pairs keyed by
+    # upload content hash. Entries evicted from memory are spilled to Parquet
+    # when a spill directory is configured and pyarrow is available, so
+    # reopening an older log only pays a Parquet read instead of a full JSON
+    # ingest. With spilling on, script stores are written next to the Parquet
+    # files and survive eviction; otherwise they live in temporary files.
+    def __init__(self, max_entries=4, spill_dir=None):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir if spill_dir and HAS_PARQUET else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f'{key}.parquet')
+
+    def _scripts_path(self, key):
+        return os.path.join(self.spill_dir, f'{key}.scripts') if self.spill_dir else None
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if (self.spill_dir and os.path.exists(self._spill_path(key))
+                and ScriptStore.exists(self._scripts_path(key))):
+            entry = (pd.read_parquet(self._spill_path(key)), ScriptStore.open(self._scripts_path(key)))
+            self.put(key, entry)
+            return entry
+        return None
+
+    def put(self, key, entry):
+        evicted = []
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        if self.spill_dir:
+            for evicted_key, (evicted_df, _) in evicted:
+                if not os.path.exists(self._spill_path(evicted_key)):
+                    evicted_df.to_parquet(self._spill_path(evicted_key), index=False)
+
+    def get_or_load(self, key, loader):
+        # loader(scripts) fills the given ScriptStore and returns the DataFrame.
+        # Loads of one key are serialized: sessions opening the same log at once
+        # share one ingest instead of writing the same spilled script file together.
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            entry = self.get(key)
+            if entry is None:
+                scripts = ScriptStore(self._scripts_path(key))
+                entry = (loader(scripts), scripts)
+                self.put(key, entry)
+            # Waiters already hold the lock object; later callers find the entry
+            with self._lock:
+                self._load_locks.pop(key, None)
+        return entry
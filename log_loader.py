@@ -0,0 +1,160 @@
+import codecs
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+
+FAILURE_UNEQUAL_LENGTH = 'Files have unequal lengths'
+FAILURE_THRESHOLD = 'Fail due to threshold'
+STATUS_CATEGORIES = ['Passed', 'Failed']
+# Longest token tail (a cut \uXXXX escape, 'false', '1e-') a chunk boundary can leave in a record
+BOUNDARY_MARGIN = 8
+
+
+def content_hash(file_obj, chunk_size=1 << 20):
+    # Hash the upload in chunks so the digest never needs a second copy of the file
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def get_failure_type(test_status):
+    if 'FAIL' not in test_status:
+        return None
+    elif FAILURE_UNEQUAL_LENGTH in test_status:
+        return FAILURE_UNEQUAL_LENGTH
+    else:
+        return FAILURE_THRESHOLD
+
+
+def classify_statuses(test_status):
+    # test_status holds a handful of distinct messages, so factorize once and
+    # classify only the unique values; codes map straight onto categoricals
+    codes, uniques = pd.factorize(test_status)
+    uniques = [status if isinstance(status, str) else '' for status in uniques]
+    status_codes = np.array([int('FAIL' in status) for status in uniques] + [0], dtype=np.int8)
+    failure_categories = [FAILURE_UNEQUAL_LENGTH, FAILURE_THRESHOLD]
+    failure_codes = np.array(
+        [-1 if failure_type is None else failure_categories.index(failure_type)
+         for failure_type in map(get_failure_type, uniques)] + [-1],
+        dtype=np.int8
+    )
+    # Missing statuses (code -1) index the trailing "Passed / no failure" slot
+    status = pd.Categorical.from_codes(status_codes[codes], categories=STATUS_CATEGORIES)
+    failure_type = pd.Categorical.from_codes(failure_codes[codes], categories=failure_categories)
+    return status, failure_type
+
+
+def enrich_dataframe(df):
+    df['startdate'] = pd.to_datetime(df['startdate'])
+    df['date'] = df['startdate'].dt.date
+    df['status'], df['failure_type'] = classify_statuses(df['test_status'])
+    testname = df['testname']
+    category = testname.str.replace(r'(?s) .*', '', regex=True).where(testname.notna() & (testname != ''), 'Unknown')
+    df['category'] = category.astype('category')
+    return df
+
+
+def iter_records(file_obj, chunk_size=1 << 20, progress=None):
+    # Yield the elements of the top-level JSON array one at a time, decoding the
+    # file in chunks so the raw text and the full object tree are never held at once
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    total = getattr(file_obj, 'size', None)
+    consumed = 0
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def read_more(min_size):
+        nonlocal buffer, pos, consumed, eof
+        chunk = file_obj.read(max(chunk_size, min_size))
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + text_decoder.decode(b'', final=True)
+        else:
+            consumed += len(chunk)
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+            if progress and total:
+                progress(min(consumed / total, 1.0))
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            read_more(0)
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise json.JSONDecodeError("Expected a JSON array of test cases", buffer, pos)
+    pos += 1
+    expect_value = True
+    empty = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+        if buffer[pos] == ']' and (empty or not expect_value):
+            # Like json.loads, nothing but whitespace may follow the closing bracket
+            pos += 1
+            skip_whitespace()
+            if pos < len(buffer):
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+            return
+        if not expect_value:
+            if buffer[pos] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Only an error at the end of the window (or an open string) can be a record cut
+            # by the chunk boundary; anything earlier is corrupt input and fails right away
+            if eof or (e.pos < len(buffer) - BOUNDARY_MARGIN and not e.msg.startswith('Unterminated string')):
+                raise
+            # Record spans the chunk boundary: grow the window geometrically and retry
+            read_more(len(buffer) - pos)
+            continue
+        if (not eof and end > len(buffer) - BOUNDARY_MARGIN and isinstance(record, (int, float))
+                and not isinstance(record, bool)):
+            # A number near the boundary may continue in the next chunk ('12' + '34', '1.5' + 'e-3')
+            read_more(len(buffer) - pos)
+            continue
+        pos = end
+        expect_value = False
+        empty = False
+        yield record
+
+
+def read_frame(file_obj, batch_size=5000, progress=None, scripts=None):
+    # Build the raw DataFrame batch by batch from the streamed records. When a
+    # ScriptStore is given the script fields go there and rows keep a script_ref.
+    batches = []
+    batch = []
+    for record in iter_records(file_obj, progress=progress):
+        if scripts is not None:
+            record['script_ref'] = scripts.append(record)
+        batch.append(record)
+        if len(batch) >= batch_size:
+            batches.append(pd.DataFrame(batch))
+            batch = []
+    if batch or not batches:
+        batches.append(pd.DataFrame(batch))
+    if scripts is not None:
+        scripts.finalize()
+    return batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
+
+
+def load_log(file_obj, batch_size=5000, progress=None, scripts=None):
+    return enrich_dataframe(read_frame(file_obj, batch_size, progress, scripts))
@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from log_loader import FAILURE_THRESHOLD, FAILURE_UNEQUAL_LENGTH, STATUS_CATEGORIES, content_hash, load_log
+from rollups import ROLLUP_KEYS, build_rollup, merge_rollups
+from script_store import SCRIPT_FIELDS, ScriptStore
+
+
+MANIFEST_NAME = 'manifest.json'
+ROLLUP_NAME = 'rollups.parquet'
+# Small row groups let the script of one test be read without the rest of its partition
+SCRIPT_ROW_GROUP_ROWS = 128
+
+
+class StoreScripts:
+    # ScriptStore-compatible reader over a LogStore: script_ref -> (partition file, row).
+    # Only the script columns of the row group holding the selected test are read.
+    # Shared across sessions: the cached row group is swapped as one tuple, never in parts.
+    def __init__(self, root, files, rows):
+        self.root = root
+        self.files = files
+        self.rows = rows
+        self._row_groups = {}
+        self._cached = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _file_row_groups(self, file_name):
+        # (parquet metadata, first row of each row group), read once per partition file
+        entry = self._row_groups.get(file_name)
+        if entry is None:
+            metadata = pq.read_metadata(os.path.join(self.root, file_name))
+            starts = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+            entry = self._row_groups[file_name] = (metadata, starts)
+        return entry
+
+    def get(self, script_ref):
+        file_name = self.files[script_ref]
+        row = int(self.rows[script_ref])
+        metadata, starts = self._file_row_groups(file_name)
+        group = int(np.searchsorted(starts, row, side='right')) - 1
+        cached = self._cached
+        if cached is None or cached[0] != (file_name, group):
+            with pq.ParquetFile(os.path.join(self.root, file_name), metadata=metadata) as parquet_file:
+                frame = parquet_file.read_row_group(group, columns=list(SCRIPT_FIELDS)).to_pandas()
+            cached = self._cached = ((file_name, group), frame, starts[group])
+        record = cached[1].iloc[row - cached[2]]
+        scripts = {}
+        for field in SCRIPT_FIELDS:
+            value = record[field]
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            scripts[field] = json.loads(value) if field == 'unequal_length_info' else value
+        return scripts
+
+    def __getstate__(self):
+        return {'root': self.root, 'files': self.files, 'rows': self.rows}
+
+    def __setstate__(self, state):
+        self.__init__(state['root'], state['files'], state['rows'])
+
+
+class LogStore:
+    # Local history of ingested logs, partitioned by test date as Parquet files:
+    #   <root>/date=YYYY-MM-DD/part-<content hash>.parquet
+    # A small manifest.json records sources (with their partition files), partitions
+    # and row counts so the date list comes from the manifest and views read only the
+    # partitions they need. rollups.parquet keeps the daily summary counts, updated on
+    # every ingest. A watched file that changes replaces the source it was ingested as.
+    def __init__(self, root):
+        if pq is None:
+            raise ImportError("The log store needs pyarrow for Parquet support: pip install pyarrow")
+        self.root = root
+        self._lock = threading.Lock()
+        # path -> (signature, error) of watched files that failed; retried once they change
+        self._failed = {}
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    @property
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'sources': {}, 'partitions': {}, 'watched': {}}
+
+    def _write_manifest(self):
+        # Write-then-rename so readers never see a half-written manifest
+        temp_path = self._manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temp_path, self._manifest_path)
+
+    @property
+    def version(self):
+        # Changes whenever a log is ingested or replaced; used as a cache key by readers
+        return self.manifest.get('revision', len(self.manifest['sources']))
+
+    def dates(self):
+        return sorted(date.fromisoformat(day) for day in self.manifest['partitions'])
+
+    def has_source(self, file_hash):
+        return file_hash in self.manifest['sources']
+
+    def ingest(self, file_obj, name=None, file_hash=None, progress=None):
+        # Append one log to the store; returns False when the same content was already ingested
+        file_hash = file_hash or content_hash(file_obj)
+        with self._lock:
+            if self.has_source(file_hash):
+                return False
+            # Scripts go to a temporary ScriptStore, not the DataFrame, and are written
+            # back one row group at a time
+            scripts = ScriptStore()
+            df = load_log(file_obj, progress=progress, scripts=scripts)
+            # Read before the new partitions exist so a first-time rebuild cannot count them twice
+            existing_rollup = self.rollup()
+            files = []
+            for day, positions in df.groupby('date', sort=True).indices.items():
+                day_key = day.isoformat()
+                file_name = os.path.join(f'date={day_key}', f'part-{file_hash}.parquet')
+                os.makedirs(os.path.join(self.root, f'date={day_key}'), exist_ok=True)
+                self._write_partition(os.path.join(self.root, file_name), df.iloc[positions], scripts)
+                partition = self.manifest['partitions'].setdefault(day_key, {'files': [], 'rows': 0})
+                partition['files'].append(file_name)
+                partition['rows'] += len(positions)
+                files.append(file_name)
+            self._write_rollup(merge_rollups(existing_rollup, build_rollup(df)))
+            self.manifest['sources'][file_hash] = {
+                'name': name,
+                'rows': len(df),
+                'files': files,
+                'ingested_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self.manifest['revision'] = self.version + 1
+            self._write_manifest()
+        return True
+
+    @staticmethod
+    def _write_partition(path, day_df, scripts):
+        # One row group per SCRIPT_ROW_GROUP_ROWS rows: metadata sliced from one Arrow
+        # table, script columns read from the ScriptStore for that row group only
+        script_refs = day_df['script_ref'].to_numpy()
+        table = pa.Table.from_pandas(day_df.drop(columns='script_ref'), preserve_index=False)
+        writer = None
+        try:
+            for start in range(0, len(day_df), SCRIPT_ROW_GROUP_ROWS):
+                records = [scripts.get(int(ref)) for ref in script_refs[start:start + SCRIPT_ROW_GROUP_ROWS]]
+                chunk = table.slice(start, SCRIPT_ROW_GROUP_ROWS)
+                for field in SCRIPT_FIELDS:
+                    values = [record.get(field) for record in records]
+                    if field == 'unequal_length_info':
+                        values = [None if info is None else json.dumps(info) for info in values]
+                    chunk = chunk.append_column(field, pa.array(values, type=pa.string()))
+                if writer is None:
+                    writer = pq.ParquetWriter(path, chunk.schema)
+                writer.write_table(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _remove_source(self, file_hash):
+        # Drop a source's partition files and their counts; caller holds the lock
+        existing_rollup = self.rollup()
+        source = self.manifest['sources'].pop(file_hash)
+        suffix = f'part-{file_hash}.parquet'
+        files = source.get('files') or [
+            file_name for partition in self.manifest['partitions'].values()
+            for file_name in partition['files'] if file_name.endswith(suffix)
+        ]
+        removed = build_rollup(self._read_files(files, ROLLUP_KEYS))
+        removed['count'] = -removed['count']
+        rollup = merge_rollups(existing_rollup, removed)
+        self._write_rollup(rollup[rollup['count'] != 0].reset_index(drop=True))
+        for file_name in files:
+            day_key = os.path.dirname(file_name).split('=', 1)[1]
+            path = os.path.join(self.root, file_name)
+            partition = self.manifest['partitions'][day_key]
+            partition['files'].remove(file_name)
+            partition['rows'] -= pq.read_metadata(path).num_rows
+            if not partition['files']:
+                del self.manifest['partitions'][day_key]
+            os.remove(path)
+        self.manifest['revision'] = self.version + 1
+
+    def ingest_directory(self, directory, progress=None):
+        # Ingest *.json files not seen before; unchanged files (same size and mtime) are not
+        # re-hashed. Returns (ingested names, [(name, error)]): a bad or half-written file is
+        # reported and skipped, never recorded as watched, and retried once it changes.
+        ingested = []
+        failed = []
+        for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+            if not entry.is_file() or not entry.name.lower().endswith('.json'):
+                continue
+            stat = entry.stat()
+            signature = {'size': stat.st_size, 'mtime': stat.st_mtime}
+            watched = self.manifest['watched'].get(entry.path)
+            if watched and all(watched[key] == value for key, value in signature.items()):
+                continue
+            if entry.path in self._failed and self._failed[entry.path][0] == signature:
+                failed.append((entry.name, self._failed[entry.path][1]))
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    file_hash = content_hash(f)
+                    if self.ingest(f, name=entry.name, file_hash=file_hash, progress=progress):
+                        ingested.append(entry.name)
+            except Exception as e:
+                self._failed[entry.path] = (signature, str(e))
+                failed.append((entry.name, str(e)))
+                continue
+            self._failed.pop(entry.path, None)
+            with self._lock:
+                previous_hash = watched['hash'] if watched else None
+                self.manifest['watched'][entry.path] = dict(signature, hash=file_hash)
+                # A grown or rewritten log replaces its earlier content instead of adding to it
+                if (previous_hash and previous_hash != file_hash and self.has_source(previous_hash)
+                        and all(other['hash'] != previous_hash for other in self.manifest['watched'].values())):
+                    self._remove_source(previous_hash)
+                self._write_manifest()
+        return ingested, failed
+
+    @property
+    def _rollup_path(self):
+        return os.path.join(self.root, ROLLUP_NAME)
+
+    def _write_rollup(self, rollup):
+        temp_path = self._rollup_path + '.tmp'
+        rollup.to_parquet(temp_path, index=False)
+        os.replace(temp_path, self._rollup_path)
+
+    def rollup(self):
+        # Daily summary counts; rebuilt from the partitions once if the file is missing
+        if os.path.exists(self._rollup_path):
+            return pd.read_parquet(self._rollup_path)
+        if not self.manifest['partitions']:
+            return None
+        rollup = build_rollup(self.read(columns=ROLLUP_KEYS))
+        self._write_rollup(rollup)
+        return rollup
+
+    def _partition_files(self, dates):
+        days = self.manifest['partitions'] if dates is None else [
+            day.isoformat() if isinstance(day, date) else day for day in dates
+        ]
+        return [file_name for day in days
+                for file_name in self.manifest['partitions'].get(day, {}).get('files', [])]
+
+    def read(self, dates=None, columns=None):
+        # Metadata columns of the requested date partitions; scripts stay on disk
+        return self._read_files(self._partition_files(dates), columns)
+
+    def _read_files(self, files, columns=None):
+        frames = [pd.read_parquet(os.path.join(self.root, file_name), columns=columns) for file_name in files]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def load(self, dates=None):
+        # (DataFrame, StoreScripts) for the requested dates, shaped like an uploaded log
+        files = self._partition_files(dates)
+        frames = []
+        ref_files = []
+        ref_rows = []
+        for file_name in files:
+            frame = pd.read_parquet(
+                os.path.join(self.root, file_name),
+                columns=self._metadata_columns(file_name)
+            )
+            ref_files.extend([file_name] * len(frame))
+            ref_rows.append(np.arange(len(frame)))
+            frames.append(frame)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if len(frames) > 1:
+            # Partitions carry their own category sets; restore the shared categoricals
+            df['status'] = pd.Categorical(df['status'], categories=STATUS_CATEGORIES)
+            df['failure_type'] = pd.Categorical(df['failure_type'], categories=[FAILURE_UNEQUAL_LENGTH, FAILURE_THRESHOLD])
+            df['category'] = df['category'].astype('category')
+        df['script_ref'] = np.arange(len(df))
+        rows = np.concatenate(ref_rows) if ref_rows else np.empty(0, dtype=np.int64)
+        return df, StoreScripts(self.root, ref_files, rows)
+
+    def _metadata_columns(self, file_name):
+        schema = pq.read_schema(os.path.join(self.root, file_name))
+        return [name for name in schema.names if name not in SCRIPT_FIELDS]
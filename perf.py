@@ -0,0 +1,142 @@
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+
+# Stage records are logged at INFO by StageProfiler.log(). The logger has no handler
+# of its own: call enable_logging() or configure 'qa_dashboard.perf' in the host app.
+logger = logging.getLogger('qa_dashboard.perf')
+_logging_lock = threading.Lock()
+
+
+def enable_logging(level=logging.INFO, stream=None):
+    # Attach a stderr handler once, unless the logger was already configured elsewhere
+    with _logging_lock:
+        if logger.handlers:
+            return
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+
+class _DiscardedRecord(dict):
+    # Record handed to every disabled stage at once; writes are dropped so callers
+    # in different sessions and threads never share data through it
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def setdefault(self, key, default=None):
+        return default
+
+
+class StageProfiler:
+    # Per-rerun wall time, allocated memory and row/point counts for named stages.
+    # Disabled profilers hand out one shared no-op context, so instrumented code
+    # pays a single attribute check. Memory uses tracemalloc, which is process-wide:
+    # it runs only while at least one profiler is inside tracing(), and with several
+    # sessions profiling at once their allocations overlap.
+    _disabled_stage = nullcontext(_DiscardedRecord())
+    _memory_lock = threading.Lock()
+    _active_traces = 0
+    _started_tracing = False
+
+    def __init__(self, enabled=False, track_memory=False):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.records = []
+
+    @contextmanager
+    def tracing(self):
+        # with profiler.tracing(): <one rerun>. Starts tracemalloc for the duration when
+        # this profiler tracks memory; the last traced run to finish stops it again
+        if not self.track_memory:
+            yield self
+            return
+        with StageProfiler._memory_lock:
+            StageProfiler._active_traces += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                StageProfiler._started_tracing = True
+        try:
+            yield self
+        finally:
+            # Only stops tracing this module started, never someone else's tracemalloc session
+            with StageProfiler._memory_lock:
+                StageProfiler._active_traces -= 1
+                if not StageProfiler._active_traces and StageProfiler._started_tracing:
+                    tracemalloc.stop()
+                    StageProfiler._started_tracing = False
+
+    def stage(self, name, **counts):
+        # with profiler.stage('parse', rows=n) as record: record['points'] = m
+        if not self.enabled:
+            return self._disabled_stage
+        return self._measure(name, counts)
+
+    @contextmanager
+    def _measure(self, name, counts):
+        record = {'stage': name}
+        record.update(counts)
+        track_memory = self.track_memory and tracemalloc.is_tracing()
+        if track_memory:
+            memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['allocated_bytes'] = current - memory_before
+                record['peak_bytes'] = peak - memory_before
+            self.records.append(record)
+
+    def to_json_lines(self):
+        return '\n'.join(json.dumps(record, default=str) for record in self.records)
+
+    def log(self, **context):
+        # One structured log line per stage
+        for record in self.records:
+            logger.info(json.dumps(dict(context, **record), default=str))
+
+
+NULL_PROFILER = StageProfiler(enabled=False)
+
+
+def profiled_method(name, counts=None):
+    # Wraps a method in self.profiler.stage(name); counts(self, result) -> dict is
+    # only evaluated when profiling is on
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            with profiler.stage(name) as record:
+                result = method(self, *args, **kwargs)
+                if counts:
+                    record.update(counts(self, result))
+            return result
+        return wrapper
+    return decorator
+
+
+def figure_points(fig):
+    # Points shipped to the browser by a Plotly figure
+    points = 0
+    for trace in fig.data:
+        # Heatmaps ship a z row per y label; other traces one entry per x (or pie value)
+        field = 'z' if trace.type == 'heatmap' else 'values' if trace.type == 'pie' else 'x'
+        data = getattr(trace, field)
+        points += 0 if data is None else len(data)
+    return {'points': points}
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class PrefetchCache:
+    # Bounded LRU of futures. get() returns the value for a key, building it in the
+    # calling thread on a miss or waiting on a background build already under way;
+    # prefetch() schedules a build on the thread pool without blocking. Evicted
+    # builds that have not started yet are cancelled.
+    def __init__(self, max_entries=16, max_workers=2):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _put(self, key, future):
+        # Caller holds the lock
+        self._entries[key] = future
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            evicted.cancel()
+
+    def get(self, key, builder):
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None and future.cancel():
+                # Still queued behind other prefetches: building here is faster than waiting
+                future = None
+            elif future is not None:
+                self._entries.move_to_end(key)
+        if future is not None and future.exception() is not None:
+            # Waits for a running build; a failed one is dropped and retried here, so the
+            # error comes from a fresh foreground build and is never cached
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+            future = None
+        if future is None:
+            value = builder()
+            future = Future()
+            future.set_result(value)
+            with self._lock:
+                self._put(key, future)
+            return value
+        return future.result()
+
+    def prefetch(self, key, builder):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._put(key, self._executor.submit(builder))
+
+    def clear(self):
+        with self._lock:
+            for future in self._entries.values():
+                future.cancel()
+            self._entries.clear()
+
@@ -0,0 +1,127 @@
+"""Headless batch report over robot test logs, without Streamlit.
+
+    python report_cli.py nightly.json [more.json ...] --out reports --workers 8 --figures 10
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from essentials import INSIGHT_COLUMNS, RobotPathVisualizer, compute_fleet_insights
+from log_loader import load_log
+from rollups import build_rollup, count_by
+from script_store import ScriptStore
+
+
+METADATA_COLUMNS = ['source', 'testname', 'startdate', 'date', 'category', 'status', 'failure_type', 'test_status']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute per-test deviation metrics for robot test logs.")
+    parser.add_argument('logs', nargs='+', help="Log JSON files to analyze")
+    parser.add_argument('--out', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--format', choices=['csv', 'json', 'both'], default='both', help="Metrics file format")
+    parser.add_argument('--figures', type=int, default=0, metavar='N',
+                        help="Export path and deviation figures for the N worst tests")
+    parser.add_argument('--figure-format', choices=['html', 'png'], default='html',
+                        help="Static figure format; png needs the kaleido package")
+    parser.add_argument('--max-points', type=int, default=5000, help="Point budget per figure trace (0 = all)")
+    return parser.parse_args(argv)
+
+
+def analyze_log(path, source, workers):
+    # (metrics DataFrame, rollup, ScriptStore) for one log file
+    scripts = ScriptStore()
+    with open(path, 'rb') as f:
+        df = load_log(f, scripts=scripts)
+    metrics = compute_fleet_insights(scripts, df['script_ref'].tolist(), max_workers=workers)
+    df['source'] = source
+    columns = [column for column in METADATA_COLUMNS if column in df] + ['script_ref']
+    # Every metrics column exists even when no test in the log could be analyzed
+    metrics = pd.DataFrame.from_dict(metrics, orient='index').reindex(columns=INSIGHT_COLUMNS)
+    report = df[columns].join(metrics, on='script_ref')
+    return report, build_rollup(df), scripts
+
+
+def summarize(report, rollup):
+    return {
+        'tests': int(rollup['count'].sum()),
+        'status': {status: int(count) for status, count in count_by(rollup, 'status').items()},
+        'failure_type': {
+            failure_type: int(count)
+            for failure_type, count in count_by(rollup.dropna(subset=['failure_type']), 'failure_type').items()
+        },
+        'worst_deviation': None if report['worst_deviation'].isna().all() else float(report['worst_deviation'].max()),
+        'errors': int(report['error'].notna().sum())
+    }
+
+
+def export_figures(report, scripts_by_source, out_dir, count, figure_format, max_points):
+    figure_dir = os.path.join(out_dir, 'figures')
+    os.makedirs(figure_dir, exist_ok=True)
+    worst = report.dropna(subset=['worst_deviation']).nlargest(count, 'worst_deviation')
+    for rank, test in enumerate(worst.itertuples(index=False), 1):
+        test_case = test._asdict()
+        test_case.update(scripts_by_source[test.source].get(test.script_ref))
+        visualizer = RobotPathVisualizer(test_case, max_points=max_points or None)
+        for kind, fig in (('paths', visualizer.plot_3d_paths()), ('deviation', visualizer.plot_deviation_analysis())):
+            file_name = os.path.join(figure_dir, f'{rank:03d}_{kind}.{figure_format}')
+            if figure_format == 'html':
+                fig.write_html(file_name, include_plotlyjs='cdn')
+            else:
+                fig.write_image(file_name)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    reports = []
+    summary = {'sources': {}}
+    scripts_by_source = {}
+    for path in args.logs:
+        # Short file names in the reports unless two inputs share one
+        source = os.path.basename(path)
+        if source in scripts_by_source:
+            source = path
+        try:
+            report, rollup, scripts = analyze_log(path, source, args.workers)
+        except Exception as e:
+            # Unreadable file, corrupt JSON or records missing required fields: skip this source only
+            print(f"Skipping {path}: {type(e).__name__}: {e}", file=sys.stderr)
+            summary.setdefault('skipped', {})[path] = f"{type(e).__name__}: {e}"
+            continue
+        reports.append(report)
+        scripts_by_source[source] = scripts
+        summary['sources'][source] = summarize(report, rollup)
+        errors = summary['sources'][source]['errors']
+        print(f"{source}: {len(report)} tests analyzed" + (f", {errors} could not be analyzed (see the error column)" if errors else ''))
+
+    if not reports:
+        print("No logs could be analyzed.", file=sys.stderr)
+        return 1
+
+    report = pd.concat(reports, ignore_index=True).sort_values('worst_deviation', ascending=False)
+    if args.format in ('csv', 'both'):
+        report.drop(columns='script_ref').to_csv(os.path.join(args.out, 'metrics.csv'), index=False)
+    if args.format in ('json', 'both'):
+        report.drop(columns='script_ref').to_json(
+            os.path.join(args.out, 'metrics.json'), orient='records', date_format='iso', indent=1
+        )
+    summary['worst_tests'] = report.dropna(subset=['worst_deviation']).head(10)[
+        ['source', 'testname', 'worst_deviation']
+    ].to_dict(orient='records')
+    with open(os.path.join(args.out, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=1, default=str)
+
+    if args.figures:
+        export_figures(report, scripts_by_source, args.out, args.figures, args.figure_format, args.max_points)
+    print(f"Reports written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import pandas as pd
+
+
+ROLLUP_KEYS = ['date', 'category', 'status', 'failure_type']
+
+
+def build_rollup(df):
+    # Test counts per (date, category, status, failure_type); a few rows per day
+    # instead of one per test, built once at ingest
+    rollup = df.groupby(ROLLUP_KEYS, observed=True, dropna=False).size().reset_index(name='count')
+    for key in ROLLUP_KEYS[1:]:
+        rollup[key] = rollup[key].astype(object)
+    return rollup
+
+
+def merge_rollups(rollup, new_rollup):
+    # Fold the counts of newly ingested records into an existing rollup
+    if rollup is None or rollup.empty:
+        return new_rollup
+    combined = pd.concat([rollup, new_rollup], ignore_index=True)
+    return combined.groupby(ROLLUP_KEYS, dropna=False, sort=True)['count'].sum().reset_index()
+
+
+def count_by(rollup, keys, dates=None):
+    # Re-aggregate the rollup to coarser keys, optionally for some dates only
+    if dates is not None:
+        rollup = rollup[rollup['date'].isin(dates)]
+    return rollup.groupby(keys, sort=False)['count'].sum()
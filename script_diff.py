@@ -0,0 +1,221 @@
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+
+def hash_lines(a_lines, b_lines):
+    # Intern every distinct line to a small int so the diff compares ints, not strings
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a_lines]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b_lines]
+    return a_ids, b_ids
+
+
+def myers_matching_blocks(a, b, max_edits=500):
+    # Myers O(ND) greedy diff. Returns difflib-style (i, j, size) matching blocks
+    # ending with the (len(a), len(b), 0) sentinel. The common prefix and suffix are
+    # stripped first; past max_edits the middle falls back to patience anchoring so
+    # heavily edited scripts stay bounded in time and in trace memory (O(D^2)).
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    middle_a, middle_b = a[prefix:n - suffix], b[prefix:m - suffix]
+
+    blocks = _myers_middle(middle_a, middle_b, max_edits)
+    if blocks is None:
+        blocks = _patience_blocks(middle_a, middle_b, max_edits)
+
+    result = [(0, 0, prefix)] if prefix else []
+    result.extend((i + prefix, j + prefix, size) for i, j, size in blocks)
+    if suffix:
+        result.append((n - suffix, m - suffix, suffix))
+    result.append((n, m, 0))
+    return result
+
+
+def _myers_middle(a, b, max_edits):
+    n, m = len(a), len(b)
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    # trace[d] keeps V for diagonals -d-1..d+1 as it was before step d
+    trace = []
+    for d in range(min(n + m, max_edits) + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace, x, y):
+    blocks = []
+    for d in range(len(trace) - 1, -1, -1):
+        previous = trace[d]
+        k = x - y
+        # Index into the stored slice, which starts at diagonal -d-1
+        if k == -d or (k != d and previous[k - 1 + d + 1] < previous[k + 1 + d + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = previous[previous_k + d + 1]
+        previous_y = previous_x - previous_k
+        # The edit moves one step off previous_x/previous_y, then a snake of equal lines follows
+        start_x = previous_x if d == 0 or previous_k == k + 1 else previous_x + 1
+        if x > start_x:
+            blocks.append((start_x, start_x - k, x - start_x))
+        x, y = previous_x, previous_y
+    blocks.reverse()
+    return blocks
+
+
+def _patience_blocks(a, b, max_edits):
+    # Anchor on lines occurring exactly once on each side, keep the longest run of
+    # anchors in order on both, and diff the gaps between them recursively. Gaps
+    # without anchors that are still too different are reported as replaced.
+    a_count, b_count = Counter(a), Counter(b)
+    b_unique = {line: j for j, line in enumerate(b) if b_count[line] == 1}
+    anchors = _longest_increasing(
+        [(i, b_unique[line]) for i, line in enumerate(a) if a_count[line] == 1 and line in b_unique]
+    )
+    if not anchors:
+        return []
+    blocks = []
+    i0 = j0 = 0
+    for i, j in anchors + [(len(a), len(b))]:
+        for gap_i, gap_j, size in myers_matching_blocks(a[i0:i], b[j0:j], max_edits)[:-1]:
+            _append_block(blocks, gap_i + i0, gap_j + j0, size)
+        if i < len(a):
+            _append_block(blocks, i, j, 1)
+        i0, j0 = i + 1, j + 1
+    return blocks
+
+
+def _longest_increasing(pairs):
+    # Patience sorting: longest subsequence of (i, j) pairs, sorted by i, with increasing j
+    tails = []
+    tail_index = []
+    previous = [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        position = bisect_left(tails, j)
+        if position:
+            previous[index] = tail_index[position - 1]
+        if position == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[position] = j
+            tail_index[position] = index
+    result = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _append_block(blocks, i, j, size):
+    # Coalesce with the previous block when the two are contiguous
+    if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+        last_i, last_j, last_size = blocks[-1]
+        blocks[-1] = (last_i, last_j, last_size + size)
+    else:
+        blocks.append((i, j, size))
+
+
+def opcodes_from_blocks(blocks):
+    # (tag, i1, i2, j1, j2) tuples in difflib's get_opcodes format
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in blocks:
+        if i < block_i and j < block_j:
+            opcodes.append(('replace', i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(('delete', i, block_i, j, j))
+        elif j < block_j:
+            opcodes.append(('insert', i, i, j, block_j))
+        if size:
+            opcodes.append(('equal', block_i, block_i + size, block_j, block_j + size))
+        i, j = block_i + size, block_j + size
+    return opcodes
+
+
+def group_hunks(opcodes, context=3):
+    # Changed runs with up to `context` equal lines around them; equal runs longer
+    # than 2 * context split hunks apart
+    hunks = []
+    hunk = []
+    leading = None
+    last = len(opcodes) - 1
+    for position, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag != 'equal':
+            if not hunk and leading:
+                hunk.append(leading)
+            hunk.append((tag, i1, i2, j1, j2))
+            continue
+        if hunk:
+            if i2 - i1 <= 2 * context and position != last:
+                hunk.append((tag, i1, i2, j1, j2))
+                continue
+            hunk.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            hunks.append(hunk)
+            hunk = []
+        leading = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2) if context else None
+    if hunk:
+        hunks.append(hunk)
+    return hunks
+
+
+class ScriptDiff:
+    # Line diff of a master/test script pair, computed once and rendered page by page
+    def __init__(self, master_script, test_script, context=3):
+        self.master_lines = master_script.splitlines()
+        self.test_lines = test_script.splitlines()
+        a_ids, b_ids = hash_lines(self.master_lines, self.test_lines)
+        self.opcodes = opcodes_from_blocks(myers_matching_blocks(a_ids, b_ids))
+        self.hunks = group_hunks(self.opcodes, context)
+        self.removed = sum(i2 - i1 for tag, i1, i2, _, _ in self.opcodes if tag in ('delete', 'replace'))
+        self.added = sum(j2 - j1 for tag, _, _, j1, j2 in self.opcodes if tag in ('insert', 'replace'))
+        # One header line per hunk plus its context, removed and added lines
+        self.line_count = sum(
+            1 + sum((i2 - i1) + (j2 - j1 if tag != 'equal' else 0) for tag, i1, i2, j1, j2 in hunk)
+            for hunk in self.hunks
+        )
+
+    @property
+    def identical(self):
+        return not self.hunks
+
+    def unified_lines(self):
+        # Lazily yields the unified diff of all hunks
+        for hunk in self.hunks:
+            _, i1, _, j1, _ = hunk[0]
+            _, _, i2, _, j2 = hunk[-1]
+            yield f'@@ -{i1 + 1},{i2 - i1} +{j1 + 1},{j2 - j1} @@'
+            for tag, i1, i2, j1, j2 in hunk:
+                if tag == 'equal':
+                    for line in self.master_lines[i1:i2]:
+                        yield ' ' + line
+                    continue
+                for line in self.master_lines[i1:i2]:
+                    yield '-' + line
+                for line in self.test_lines[j1:j2]:
+                    yield '+' + line
+
+    def page(self, number, page_size):
+        # Only the requested slice of the diff is materialized
+        start = number * page_size
+        return '\n'.join(islice(self.unified_lines(), start, start + page_size))
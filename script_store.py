@@ -0,0 +1,119 @@
+import json
+import mmap
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+
+SCRIPT_FIELDS = ('master_script', 'test_script', 'unequal_length_info')
+
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ScriptStore:
+    # Append-only, memory-mapped store for the large per-test fields. Ingest
+    # pops master_script/test_script/unequal_length_info out of each record and
+    # keeps only an integer script_ref in the DataFrame; the text is read back
+    # on demand for the single selected test.
+    def __init__(self, path=None):
+        self.temporary = path is None
+        if self.temporary:
+            fd, path = tempfile.mkstemp(suffix='.scripts')
+            os.close(fd)
+        self.path = path
+        self._file = open(path, 'wb')
+        self._offsets = []
+        self._index = None
+        self._mmap = None
+        self._size = 0
+        if self.temporary:
+            self._finalizer = weakref.finalize(self, _remove_files, path)
+
+    @classmethod
+    def open(cls, path):
+        # Reopen a store previously written with finalize() at this path
+        store = cls.__new__(cls)
+        store.temporary = False
+        store.path = path
+        store._file = None
+        store._offsets = None
+        store._index = np.load(cls._index_path(path))
+        store._mmap = None
+        store._size = os.path.getsize(path)
+        return store
+
+    @staticmethod
+    def _index_path(path):
+        return path + '.idx.npy'
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(path) and os.path.exists(ScriptStore._index_path(path))
+
+    def __len__(self):
+        return len(self._index) if self._index is not None else len(self._offsets)
+
+    def append(self, record):
+        # Moves the script fields out of record and returns its script_ref
+        entry = []
+        for field in SCRIPT_FIELDS:
+            value = record.pop(field, None)
+            if value is None:
+                entry.extend((0, -1))
+                continue
+            if field == 'unequal_length_info':
+                value = json.dumps(value)
+            data = value.encode('utf-8')
+            entry.extend((self._size, len(data)))
+            self._file.write(data)
+            self._size += len(data)
+        self._offsets.append(entry)
+        return len(self._offsets) - 1
+
+    def finalize(self):
+        self._file.close()
+        self._file = None
+        self._index = np.array(self._offsets, dtype=np.int64).reshape(-1, 2 * len(SCRIPT_FIELDS))
+        self._offsets = None
+        if not self.temporary:
+            np.save(self._index_path(self.path), self._index)
+        return self
+
+    def _buffer(self):
+        if self._mmap is None and self._size:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def get(self, script_ref):
+        buffer = self._buffer()
+        row = self._index[script_ref]
+        scripts = {}
+        for i, field in enumerate(SCRIPT_FIELDS):
+            start, length = row[2 * i], row[2 * i + 1]
+            if length < 0:
+                continue
+            value = buffer[start:start + length].decode('utf-8') if length else ''
+            scripts[field] = json.loads(value) if field == 'unequal_length_info' else value
+        return scripts
+
+    def __getstate__(self):
+        # Worker processes get a read-only view; only the creating instance cleans up
+        return {'path': self.path, 'index': self._index, 'size': self._size}
+
+    def __setstate__(self, state):
+        self.temporary = False
+        self.path = state['path']
+        self._file = None
+        self._offsets = None
+        self._index = state['index']
+        self._mmap = None
+        self._size = state['size']
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_index import FilterIndex
+from log_loader import FAILURE_THRESHOLD, FAILURE_UNEQUAL_LENGTH, enrich_dataframe
+
+
+STATUSES = ['✅ PASS', '❌ FAIL: Files have unequal lengths.', '❌ FAIL: Deviation over threshold.']
+FAILURE_SELECTIONS = [None, [], [FAILURE_UNEQUAL_LENGTH], [FAILURE_THRESHOLD], [FAILURE_UNEQUAL_LENGTH, FAILURE_THRESHOLD]]
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(0)
+    rows = 600
+    categories = np.array(['Weld', 'Pick', 'Place', 'Glue', ''], dtype=object)
+    # Few distinct names per category so repeated test names are common
+    raw = pd.DataFrame({
+        'testname': categories[rng.integers(len(categories), size=rows)] + ' test ' + rng.integers(6, size=rows).astype(str),
+        'startdate': (pd.Timestamp('2024-08-01') + pd.to_timedelta(rng.integers(0, 86400 * 4, size=rows), unit='s')).astype(str),
+        'test_status': np.array(STATUSES, dtype=object)[rng.integers(len(STATUSES), size=rows)],
+    })
+    df = enrich_dataframe(raw)
+    df['script_ref'] = np.arange(len(df))
+    return df
+
+
+def legacy_cascade(df, date, status, failure_types):
+    # Boolean-mask cascade the sidebar used before FilterIndex
+    filtered_df = df[df['date'] == date]
+    filtered_df = filtered_df[filtered_df['status'] == status]
+    if status == 'Failed' and failure_types:
+        filtered_df = filtered_df[filtered_df['failure_type'].isin(failure_types)]
+    return filtered_df
+
+
+def test_positions_by_date(df):
+    index = FilterIndex(df)
+    assert index.dates == sorted(df['date'].unique())
+    for date in index.dates:
+        assert index.positions(date).tolist() == np.flatnonzero(df['date'] == date).tolist()
+
+
+def test_cascade_matches_boolean_masks(df):
+    index = FilterIndex(df)
+    for date, status, failure_types in itertools.product(index.dates, ['Passed', 'Failed'], FAILURE_SELECTIONS):
+        # The sidebar only passes failure types with the Failed status
+        index_failure_types = failure_types if status == 'Failed' else None
+        filtered_df = legacy_cascade(df, date, status, failure_types)
+        assert index.positions(date, status, index_failure_types).tolist() == \
+            df.index.get_indexer(filtered_df.index).tolist()
+
+        categories = index.categories(date, status, index_failure_types)
+        assert categories == filtered_df['category'].unique().tolist()
+        for category in categories:
+            filtered_category_df = filtered_df[filtered_df['category'] == category]
+            testnames = index.testnames(date, status, index_failure_types, category)
+            assert testnames == filtered_category_df['testname'].tolist()
+            for testname in set(testnames):
+                expected = filtered_category_df[filtered_category_df['testname'] == testname].iloc[0]
+                record = index.test_record(testname, date, status, index_failure_types, category)
+                assert pd.Series(record).equals(expected)
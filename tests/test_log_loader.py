@@ -0,0 +1,121 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from log_loader import enrich_dataframe, get_failure_type, iter_records
+
+
+TESTNAMES = [
+    'Weld program_1 run_0', 'Weld', None, '', ' leading space', '  two leading',
+    'line\nbreak name', 'tab\tseparated name', 'trailing ', 'Pick\n second', 'Weld run\nsecond line', 'Ünïcode name',
+]
+STATUSES = [
+    '✅ PASS', '❌ FAIL: Files have unequal lengths.', '❌ FAIL: deviation over threshold',
+    'FAIL', 'fail lowercase is not a failure', '', 'PASSED with Files have unequal lengths',
+    'FAILFiles have unequal lengths', '❌ FAIL:\nmulti line',
+]
+
+
+def legacy_enrich(df):
+    # The per-row classification enrich_dataframe replaced
+    df['status'] = df['test_status'].apply(lambda x: 'Failed' if 'FAIL' in x else 'Passed')
+    df['category'] = df['testname'].apply(lambda x: x.split(' ')[0] if x else 'Unknown')
+    df['failure_type'] = df['test_status'].apply(get_failure_type)
+    return df
+
+
+def raw_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    # object columns keep None as None, the way the legacy code saw missing names
+    return pd.DataFrame({
+        'testname': pd.Series([TESTNAMES[i] for i in rng.integers(len(TESTNAMES), size=rows)], dtype=object),
+        'startdate': pd.Timestamp('2024-08-01') + pd.to_timedelta(rng.integers(0, 86400 * 3, size=rows), unit='s'),
+        'test_status': pd.Series([STATUSES[i] for i in rng.integers(len(STATUSES), size=rows)], dtype=object),
+    })
+
+
+def as_objects(series):
+    # Categoricals and object columns compared value by value, missing values as None
+    values = series.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_enrichment_matches_legacy_apply(seed):
+    raw = raw_frame(2000, seed)
+    expected = legacy_enrich(raw.copy())
+    enriched = enrich_dataframe(raw.copy())
+    for column in ('status', 'category', 'failure_type'):
+        assert as_objects(enriched[column]) == as_objects(expected[column]), column
+
+
+def test_enrichment_covers_every_combination():
+    pairs = [(name, status) for name in TESTNAMES for status in STATUSES]
+    raw = pd.DataFrame({
+        'testname': pd.Series([name for name, _ in pairs], dtype=object),
+        'startdate': '2024-08-01 10:00:00',
+        'test_status': pd.Series([status for _, status in pairs], dtype=object),
+    })
+    expected = legacy_enrich(raw.copy())
+    enriched = enrich_dataframe(raw.copy())
+    for column in ('status', 'category', 'failure_type'):
+        assert as_objects(enriched[column]) == as_objects(expected[column]), column
+
+
+def test_enrichment_ignores_string_dtype():
+    # Newer pandas infers a string dtype with NaN for missing names; results must not change
+    raw = raw_frame(500, 3)
+    expected = enrich_dataframe(raw.copy())
+    enriched = enrich_dataframe(raw.astype({'testname': 'string', 'test_status': 'string'}))
+    for column in ('status', 'category', 'failure_type'):
+        assert as_objects(enriched[column]) == as_objects(expected[column]), column
+
+
+def test_enrichment_dtypes():
+    enriched = enrich_dataframe(raw_frame(50, 0))
+    for column in ('status', 'category', 'failure_type'):
+        assert isinstance(enriched[column].dtype, pd.CategoricalDtype)
+
+
+DOCUMENTS = [
+    '[]', ' [ ]\n', '[{"a": 1}]', '[{"a": 1}, {"b": [2, 3]}]  \n', '[123456, 7]', '[1.5e-10, -0.25, 1E+3]',
+    '[true, false, null]', '[{"s": "caf\\u00e9 \\"quoted\\" \\\\ end"}]', '[{"s": "h\u00e9llo \u2705 \u274c"}]',
+    '[{"nested": {"deep": [{"x": "y"}]}}]', '[{"a": 1},]', '[,]', '[{"a": 1}] trailing', '[] []',
+    '[{"a": 1}', '[{"a": 1} {"b": 2}]', '[{"a": tru}]', '[{"a": 1,}]', '[{"a" 1}]', '{"a": 1}', '',
+    '[{"s": "unterminated}]', '[12, 3', '[-]',
+]
+
+
+def read_all(data, chunk_size):
+    return list(iter_records(io.BytesIO(data), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 6, 7, 64, 1 << 20])
+def test_iter_records_matches_json_loads(document, chunk_size):
+    try:
+        expected = json.loads(document)
+    except ValueError:
+        expected = None
+    if not isinstance(expected, list):
+        with pytest.raises(json.JSONDecodeError):
+            read_all(document.encode('utf-8'), chunk_size)
+    else:
+        assert read_all(document.encode('utf-8'), chunk_size) == expected
+
+
+def test_iter_records_skips_bom():
+    assert read_all('[{"a": 1}]'.encode('utf-8-sig'), 2) == [{'a': 1}]
+
+
+def test_iter_records_fails_fast_on_corrupt_record():
+    # A syntax error well inside the window must not pull the rest of the file into memory
+    record = json.dumps({'master_script': 'x' * 1000})
+    data = ('[' + record + ', {"a": @}, ' + ', '.join([record] * 5000) + ']').encode('utf-8')
+    file_obj = io.BytesIO(data)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_records(file_obj, chunk_size=4096))
+    assert file_obj.tell() <= 4 * 4096
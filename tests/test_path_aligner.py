@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from essentials import PathAligner
+
+
+def dtw_cost(master, test, allowed=None):
+    # Plain O(N*M) DTW; allowed masks the cells a band permits
+    n, m = len(master), len(test)
+    cost = np.linalg.norm(master[:, None, :] - test[None, :, :], axis=2)
+    if allowed is not None:
+        cost = np.where(allowed, cost, np.inf)
+    total = np.full((n + 1, m + 1), np.inf)
+    total[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            total[i, j] = cost[i - 1, j - 1] + min(total[i - 1, j - 1], total[i - 1, j], total[i, j - 1])
+    return total[n, m]
+
+
+def band_mask(n, m, band):
+    # Cells inside the Sakoe-Chiba window dtw_indices searches
+    half_width = max(band, -(-m // n) + 1)
+    width = min(2 * half_width + 1, m)
+    starts = PathAligner._window_starts(n, m, width, half_width)
+    columns = np.arange(m)
+    return (columns >= starts[:, None]) & (columns < starts[:, None] + width)
+
+
+def path_cost(master, test, master_idx, test_idx):
+    return np.linalg.norm(master[master_idx] - test[test_idx], axis=1).sum()
+
+
+def assert_valid_path(master_idx, test_idx, n, m):
+    assert (master_idx[0], test_idx[0]) == (0, 0)
+    assert (master_idx[-1], test_idx[-1]) == (n - 1, m - 1)
+    steps = set(zip(np.diff(master_idx).tolist(), np.diff(test_idx).tolist()))
+    assert steps <= {(1, 1), (1, 0), (0, 1)}
+
+
+def random_pair(rng):
+    n, m = rng.integers(1, 40, size=2)
+    master = np.cumsum(rng.normal(size=(n, 3)), axis=0)
+    test = np.cumsum(rng.normal(size=(m, 3)), axis=0)
+    return master, test
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_wide_band_matches_full_dtw(seed):
+    master, test = random_pair(np.random.default_rng(seed))
+    master_idx, test_idx = PathAligner.dtw_indices(master, test, band=100)
+    assert_valid_path(master_idx, test_idx, len(master), len(test))
+    assert path_cost(master, test, master_idx, test_idx) == pytest.approx(dtw_cost(master, test))
+
+
+@pytest.mark.parametrize('seed', range(30))
+@pytest.mark.parametrize('band', [1, 3])
+def test_narrow_band_matches_banded_dtw(seed, band):
+    master, test = random_pair(np.random.default_rng(seed))
+    n, m = len(master), len(test)
+    master_idx, test_idx = PathAligner.dtw_indices(master, test, band=band)
+    assert_valid_path(master_idx, test_idx, n, m)
+    assert band_mask(n, m, band)[master_idx, test_idx].all()
+    assert path_cost(master, test, master_idx, test_idx) == pytest.approx(dtw_cost(master, test, band_mask(n, m, band)))
+
+
+def test_block_boundaries(monkeypatch):
+    # Rows are processed in blocks; results must not depend on where blocks split
+    master, test = random_pair(np.random.default_rng(99))
+    expected = PathAligner.dtw_indices(master, test, band=2)
+    monkeypatch.setattr(PathAligner, 'BLOCK_ROWS', 3)
+    result = PathAligner.dtw_indices(master, test, band=2)
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+
+def test_empty_input():
+    master_idx, test_idx = PathAligner.dtw_indices(np.empty((0, 3)), np.zeros((4, 3)))
+    assert len(master_idx) == len(test_idx) == 0
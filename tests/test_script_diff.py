@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+import script_diff
+from script_diff import ScriptDiff, myers_matching_blocks, opcodes_from_blocks
+
+
+def lcs_length(a, b):
+    # Textbook O(N*M) longest common subsequence
+    lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            lengths[i][j] = lengths[i + 1][j + 1] + 1 if a[i] == b[j] else max(lengths[i + 1][j], lengths[i][j + 1])
+    return lengths[0][0]
+
+
+def random_pair(rng):
+    # Few distinct values so lines repeat; the x7 variants give patience some unique anchors
+    a = [rng.randint(0, 4) for _ in range(rng.randint(0, 25))]
+    b = [rng.randint(0, 4) for _ in range(rng.randint(0, 25))]
+    return ([x * 7 if rng.random() < 0.5 else x for x in a],
+            [x * 7 if rng.random() < 0.5 else x for x in b])
+
+
+def rebuild(a, b, opcodes):
+    # Opcodes must cover both sides contiguously; applying them to a yields b
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            assert tag in ('replace', 'delete', 'insert')
+            result.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_uncapped_diff_is_minimal(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        a, b = random_pair(rng)
+        blocks = myers_matching_blocks(a, b, max_edits=2000)
+        assert blocks[-1] == (len(a), len(b), 0)
+        assert rebuild(a, b, opcodes_from_blocks(blocks)) == b
+        assert sum(size for _, _, size in blocks) == lcs_length(a, b)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_capped_diff_falls_back_to_patience(seed, monkeypatch):
+    calls = []
+    patience_blocks = script_diff._patience_blocks
+
+    def counting_patience(a, b, max_edits):
+        calls.append(len(a) + len(b))
+        return patience_blocks(a, b, max_edits)
+
+    monkeypatch.setattr(script_diff, '_patience_blocks', counting_patience)
+    rng = random.Random(seed)
+    for _ in range(50):
+        a, b = random_pair(rng)
+        blocks = myers_matching_blocks(a, b, max_edits=rng.randint(0, 5))
+        assert rebuild(a, b, opcodes_from_blocks(blocks)) == b
+    assert calls
+
+
+def test_patience_keeps_edits_bounded():
+    # A heavily edited long script: the capped diff is still a valid edit script
+    rng = random.Random(0)
+    a = [f'MoveL p{rng.randint(0, 200)}' for _ in range(3000)]
+    b = [line if rng.random() < 0.7 else f'MoveJ p{rng.randint(0, 200)}' for line in a]
+    blocks = myers_matching_blocks(a, b, max_edits=50)
+    assert rebuild(a, b, opcodes_from_blocks(blocks)) == b
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_unified_lines_match_line_count(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        a, b = random_pair(rng)
+        diff = ScriptDiff('\n'.join(map(str, a)), '\n'.join(map(str, b)), context=rng.randint(0, 3))
+        lines = list(diff.unified_lines())
+        assert len(lines) == diff.line_count
+        assert diff.identical == (a == b)
+        assert diff.removed == sum(line.startswith('-') for line in lines)
+        assert diff.added == sum(line.startswith('+') for line in lines)
+
+
+def test_pages_cover_the_whole_diff():
+    diff = ScriptDiff('\n'.join(f'line {i}' for i in range(100)),
+                      '\n'.join(f'line {i}' if i % 7 else 'changed' for i in range(100)))
+    pages = [diff.page(number, 9) for number in range(-(-diff.line_count // 9))]
+    assert '\n'.join(pages).split('\n') == list(diff.unified_lines())